@@ -1,3 +1,4 @@
+import datetime as dt
 import os
 from pathlib import Path
 
@@ -31,6 +32,7 @@ DJANGO_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.humanize",
+    "django.contrib.postgres",
     "django.forms",
 ]
 
@@ -50,7 +52,6 @@ THIRD_PARTY_APPS = [
     "compressor",
     "import_export",
     "template_partials",
-    "watson",
 ]
 
 LOCAL_APPS = [
@@ -76,7 +77,6 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
-    "watson.middleware.SearchContextMiddleware",
     "leerming.profiles.middleware.TimezoneMiddleware",
 ]
 
@@ -206,6 +206,42 @@ DEFAULT_FROM_EMAIL = env(
     "DJANGO_DEFAULT_FROM_EMAIL", default="leerming <noreply@leerming.com>"
 )
 SERVER_EMAIL = env("DJANGO_SERVER_EMAIL", default=DEFAULT_FROM_EMAIL)
+# template stored by the email provider, when set the review notifications are sent in batches
+REVIEW_NOTIFICATION_TEMPLATE_ID = env(
+    "DJANGO_REVIEW_NOTIFICATION_TEMPLATE_ID", default=None
+)
+# maximum number of recipients per call of the provider, 50 for Amazon SES
+REVIEW_NOTIFICATION_BATCH_SIZE = env.int(
+    "DJANGO_REVIEW_NOTIFICATION_BATCH_SIZE", default=50
+)
+# the notifications of a review time are spread over this window, see `Notification.get_delay`
+NOTIFICATION_DISPATCH_WINDOW = dt.timedelta(
+    minutes=env.int("DJANGO_NOTIFICATION_DISPATCH_WINDOW_MINUTES", default=10)
+)
+# emails per second of all the workers, the sending rate of the Amazon SES account
+NOTIFICATION_EMAIL_RATE = env.float("DJANGO_NOTIFICATION_EMAIL_RATE", default=14)
+
+# web push, the keys are generated with `python manage.py generate_vapid_keys`
+WEBPUSH_VAPID_PUBLIC_KEY = env("DJANGO_WEBPUSH_VAPID_PUBLIC_KEY", default="")
+WEBPUSH_VAPID_PRIVATE_KEY = env("DJANGO_WEBPUSH_VAPID_PRIVATE_KEY", default="")
+WEBPUSH_VAPID_SUBJECT = env(
+    "DJANGO_WEBPUSH_VAPID_SUBJECT", default="mailto:noreply@leerming.com"
+)
+# maximum number of push requests in flight
+WEBPUSH_CONCURRENCY = env.int("DJANGO_WEBPUSH_CONCURRENCY", default=50)
+# the pushes are answered locally instead of being sent to the push services
+WEBPUSH_STUB = env.bool("DJANGO_WEBPUSH_STUB", default=False)
+# hosts of the push services of the browsers, a subscription can only point to one of them
+# or to one of their subdomains
+WEBPUSH_ALLOWED_HOSTS = env.list(
+    "DJANGO_WEBPUSH_ALLOWED_HOSTS",
+    default=[
+        "fcm.googleapis.com",
+        "updates.push.services.mozilla.com",
+        "push.apple.com",
+        "notify.windows.com",
+    ],
+)
 
 CACHES = {
     "default": {
@@ -0,0 +1,37 @@
+import datetime as dt
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from django.db.models.signals import pre_migrate
+from django.dispatch import receiver
+
+from leerming.profiles.models import Profile
+from leerming.users.models import User
+
+
+@receiver(pre_migrate)
+def create_extensions(using, **kwargs):
+    # the tests run without the migrations, the indexes need the extensions they create
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    # the database cache table is not created by migrate
+    with django_db_blocker.unblock():
+        call_command("createcachetable")
+
+
+@pytest.fixture
+def user(db) -> User:
+    return User.objects.create_user(email="user@leerming.com", password="password")
+
+
+@pytest.fixture
+def profile(user) -> Profile:
+    return Profile.objects.create(
+        user=user, review_days=list(Profile.Weekday.values), review_time=dt.time(18)
+    )
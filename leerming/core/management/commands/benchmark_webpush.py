@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leerming.core.webpush import send_pushes
+from leerming.core.webpush import stub_transport
+
+
+class Command(BaseCommand):
+    help = "Measure the push throughput against the local stub push service, offline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscriptions", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument(
+            "--latency", type=float, default=0.05, help="seconds per push request"
+        )
+
+    def handle(self, *args, **options):
+        nbr_of_subscriptions = options["subscriptions"]
+        # one in a hundred subscriptions has expired
+        subscriptions = [
+            (
+                i,
+                f"https://push.example.com/send/{i}"
+                + ("/expired" if i % 100 == 0 else ""),
+            )
+            for i in range(nbr_of_subscriptions)
+        ]
+        started_at = time.perf_counter()
+        result = send_pushes(
+            subscriptions,
+            concurrency=options["concurrency"],
+            transport=stub_transport(latency=options["latency"]),
+        )
+        duration = time.perf_counter() - started_at
+        self.stdout.write(
+            f"{len(result.sent)} sent, {len(result.failed)} failed, "
+            f"{len(result.expired)} expired "
+            f"in {duration:.2f}s ({nbr_of_subscriptions / duration:.0f} pushes/s)"
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from leerming.core.webpush import generate_vapid_keys
+
+
+class Command(BaseCommand):
+    help = "Generate the VAPID keys of the web push notifications"
+
+    def handle(self, *args, **options):
+        private_key, public_key = generate_vapid_keys()
+        self.stdout.write(f"DJANGO_WEBPUSH_VAPID_PRIVATE_KEY={private_key}")
+        self.stdout.write(f"DJANGO_WEBPUSH_VAPID_PUBLIC_KEY={public_key}")
@@ -0,0 +1,173 @@
+import base64
+import binascii
+import copy
+import datetime as dt
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+
+def _get_field(queryset: QuerySet, name: str):
+    """The model field, or the output field of an annotation, e.g. a search rank."""
+    if annotation := queryset.query.annotations.get(name):
+        field = copy.copy(annotation.output_field)
+        field.set_attributes_from_name(name)
+        return field
+    return queryset.model._meta.get_field(name)
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Keep the microseconds of the datetimes, DjangoJSONEncoder cuts them to milliseconds and
+    the rows created in the same millisecond would be skipped."""
+
+    def default(self, o):
+        if isinstance(o, dt.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _encode_cursor(obj, fields: Sequence) -> str:
+    values = [getattr(obj, field.attname) for field in fields]
+    return base64.urlsafe_b64encode(
+        json.dumps(values, cls=_CursorEncoder).encode()
+    ).decode()
+
+
+def _decode_cursor(cursor: str, fields: Sequence) -> list | None:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(fields):
+            return None
+        return [
+            field.to_python(value) for field, value in zip(fields, values, strict=True)
+        ]
+    except (binascii.Error, ValueError, TypeError, ValidationError):
+        return None
+
+
+def _order_by(order: str, field):
+    """Nulls sort before any value, the same as `NULLS FIRST` ascending."""
+    name = order.lstrip("-")
+    if not field.null:
+        return order
+    if order.startswith("-"):
+        return F(name).desc(nulls_last=True)
+    return F(name).asc(nulls_first=True)
+
+
+def _compare(field, value, lookup: str) -> Q | None:
+    name = field.name
+    if lookup == "gt":
+        if value is None:
+            return Q(**{f"{name}__isnull": False})
+        return Q(**{f"{name}__gt": value})
+    if value is None:
+        # nothing sorts before a null
+        return None
+    if field.null:
+        return Q(**{f"{name}__lt": value}) | Q(**{f"{name}__isnull": True})
+    return Q(**{f"{name}__lt": value})
+
+
+def _seek_filter(
+    ordering: Sequence[str], fields: Sequence, values: list, forward: bool
+) -> Q:
+    """Rows strictly after (or before) the given values in the ordering, the same as a
+    row value comparison like `(a, b) < (x, y)`, spelled with plain lookups."""
+    conditions = []
+    for i, (order, field, value) in enumerate(
+        zip(ordering, fields, values, strict=True)
+    ):
+        descending = order.startswith("-")
+        comparison = _compare(field, value, "lt" if descending == forward else "gt")
+        if comparison is None:
+            continue
+        # an exact lookup on None is an IS NULL
+        equalities = Q(
+            **{
+                previous.name: previous_value
+                for previous, previous_value in zip(fields[:i], values[:i], strict=True)
+            }
+        )
+        conditions.append(equalities & comparison)
+    return reduce(lambda a, b: a | b, conditions)
+
+
+def paginate_by_keyset(
+    queryset: QuerySet,
+    ordering: Sequence[str],
+    per_page: int,
+    after: str | None = None,
+    before: str | None = None,
+) -> KeysetPage:
+    """
+    Paginate without OFFSET, a page is found from the values of the last (or first) row of the page
+    next to it, so the cost of a page does not depend on how deep it is. The ordering can use fields and
+    annotations, it must end with a unique non nullable field and is ideally backed by an index. The nulls
+    of the nullable fields sort before any value (`NULLS FIRST` ascending, `NULLS LAST` descending).
+    Invalid cursors give the first page.
+    """
+    fields = [_get_field(queryset, order.lstrip("-")) for order in ordering]
+    order_by = [
+        _order_by(order, field) for order, field in zip(ordering, fields, strict=True)
+    ]
+
+    if before and (values := _decode_cursor(before, fields)):
+        reversed_order_by = [
+            _order_by(order[1:] if order.startswith("-") else f"-{order}", field)
+            for order, field in zip(ordering, fields, strict=True)
+        ]
+        rows = list(
+            queryset.filter(
+                _seek_filter(ordering, fields, values, forward=False)
+            ).order_by(*reversed_order_by)[: per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        values = _decode_cursor(after, fields) if after else None
+        if values:
+            queryset = queryset.filter(
+                _seek_filter(ordering, fields, values, forward=True)
+            )
+        rows = list(queryset.order_by(*order_by)[: per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = values is not None
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=_encode_cursor(rows[-1], fields) if rows and has_next else None,
+        previous_cursor=_encode_cursor(rows[0], fields)
+        if rows and has_previous
+        else None,
+    )
@@ -0,0 +1,33 @@
+import time
+
+
+class TokenBucket:
+    """
+    Allow `rate` operations per second on average, with bursts of at most `capacity` operations.
+    The operations are taken after the fact, the bucket can go into debt and `wait` blocks until
+    it is paid back. The bucket starts full unless the number of `tokens` is given.
+    """
+
+    def __init__(self, rate: float, capacity: float, tokens: float | None = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity if tokens is None else tokens
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def wait(self, tokens: float = 1) -> None:
+        """Block until `tokens` are available, at most the capacity of the bucket."""
+        self._refill()
+        if self.tokens < tokens:
+            time.sleep((tokens - self.tokens) / self.rate)
+            self._refill()
+
+    def take(self, tokens: int) -> None:
+        self._refill()
+        self.tokens -= tokens
@@ -0,0 +1,96 @@
+import datetime as dt
+
+from django.utils import timezone
+
+from leerming.core.pagination import paginate_by_keyset
+from leerming.flashcards.models import FlashCard
+
+ORDERING = ("next_review_date", "-created", "-id")
+
+
+def _make_flashcards(user, values):
+    return FlashCard.objects.bulk_create(
+        FlashCard(
+            owner=user,
+            question=f"question {i}",
+            answer=f"answer {i}",
+            next_review_date=next_review_date,
+            created=created,
+        )
+        for i, (next_review_date, created) in enumerate(values)
+    )
+
+
+def _walk(queryset, per_page):
+    pages = [paginate_by_keyset(queryset, ordering=ORDERING, per_page=per_page)]
+    while pages[-1].has_next:
+        pages.append(
+            paginate_by_keyset(
+                queryset,
+                ordering=ORDERING,
+                per_page=per_page,
+                after=pages[-1].next_cursor,
+            )
+        )
+    return pages
+
+
+def test_rows_created_in_the_same_millisecond(user):
+    created = timezone.now().replace(microsecond=123000)
+    _make_flashcards(
+        user,
+        [
+            (None, created + dt.timedelta(microseconds=400)),
+            (None, created + dt.timedelta(microseconds=200)),
+            (None, created),
+        ],
+    )
+    queryset = user.flashcards.all()
+
+    pages = _walk(queryset, per_page=1)
+
+    expected = list(queryset.order_by("-created", "-id").values_list("id", flat=True))
+    assert [flashcard.id for page in pages for flashcard in page] == expected
+
+
+def test_nulls_first_then_dates(user):
+    created = timezone.now()
+    today = created.date()
+    _make_flashcards(
+        user,
+        [
+            (today, created),
+            (None, created),
+            (today - dt.timedelta(days=1), created),
+            (None, created - dt.timedelta(seconds=1)),
+            (today, created - dt.timedelta(seconds=1)),
+        ],
+    )
+    queryset = user.flashcards.all()
+
+    pages = _walk(queryset, per_page=2)
+
+    flashcards = [flashcard for page in pages for flashcard in page]
+    assert [(f.next_review_date, f.created) for f in flashcards] == [
+        (None, created),
+        (None, created - dt.timedelta(seconds=1)),
+        (today - dt.timedelta(days=1), created),
+        (today, created),
+        (today, created - dt.timedelta(seconds=1)),
+    ]
+
+
+def test_previous_page_mirrors_next_page(user):
+    created = timezone.now()
+    _make_flashcards(
+        user, [(None, created - dt.timedelta(microseconds=i)) for i in range(5)]
+    )
+    queryset = user.flashcards.all()
+    first, second = _walk(queryset, per_page=3)
+
+    previous = paginate_by_keyset(
+        queryset, ordering=ORDERING, per_page=3, before=second.previous_cursor
+    )
+
+    assert [f.id for f in previous] == [f.id for f in first]
+    assert not previous.has_previous
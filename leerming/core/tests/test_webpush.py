@@ -0,0 +1,69 @@
+import httpx
+import pytest
+
+from leerming.core import webpush
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Count the requests in flight on the stub push service, fail the `/unreachable` endpoints."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests: list[httpx.Request] = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.url.path.endswith("/unreachable"):
+            raise httpx.ConnectError("unreachable", request=request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def _stub_vapid_keys(settings):
+    settings.WEBPUSH_STUB = True
+
+
+def _subscriptions(paths: list[str]) -> list[tuple[int, str]]:
+    return [
+        (i, f"https://fcm.googleapis.com/fcm/send/{path}")
+        for i, path in enumerate(paths)
+    ]
+
+
+def test_send_pushes_bounds_the_requests_in_flight():
+    transport = _CountingTransport(webpush.stub_transport(latency=0.01))
+    subscriptions = _subscriptions([str(i) for i in range(20)])
+
+    result = webpush.send_pushes(subscriptions, concurrency=3, transport=transport)
+
+    assert len(transport.requests) == 20
+    assert transport.max_in_flight == 3
+    assert sorted(result.sent) == list(range(20))
+
+
+def test_send_pushes_sorts_the_failed_and_expired_subscriptions():
+    transport = _CountingTransport(webpush.stub_transport())
+    subscriptions = _subscriptions(["ok", "expired", "unreachable", "ok", "expired"])
+
+    result = webpush.send_pushes(subscriptions, concurrency=2, transport=transport)
+
+    assert sorted(result.sent) == [0, 3]
+    assert sorted(result.expired) == [1, 4]
+    assert result.failed == [2]
+
+
+def test_send_pushes_signs_a_token_for_the_push_service():
+    transport = _CountingTransport(webpush.stub_transport())
+
+    webpush.send_pushes(_subscriptions(["1", "2"]), transport=transport)
+
+    for request in transport.requests:
+        assert request.headers["Authorization"].startswith("vapid t=")
+        assert request.headers["TTL"] == str(webpush.PUSH_TTL)
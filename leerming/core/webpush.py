@@ -0,0 +1,173 @@
+"""
+Web push notifications, sent without payload: the push service wakes up the service worker of
+the subscription and it shows the notification, so the messages do not need to be encrypted.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import httpx
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.hazmat.primitives.serialization import PublicFormat
+from django.conf import settings
+
+# seconds, the push services refuse tokens valid for more than 24 hours
+VAPID_TOKEN_LIFETIME = 12 * 60 * 60
+# seconds the push service keeps the notification when the device is offline
+PUSH_TTL = 60 * 60
+# answers of the push services for subscriptions that expired or were revoked
+EXPIRED_STATUS_CODES = (404, 410)
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def generate_vapid_keys() -> tuple[str, str]:
+    """Return a new (private key, public key) pair, encoded as expected by the browsers."""
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public_key = private_key.public_key().public_bytes(
+        Encoding.X962, PublicFormat.UncompressedPoint
+    )
+    return (
+        _b64encode(private_key.private_numbers().private_value.to_bytes(32, "big")),
+        _b64encode(public_key),
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_vapid_keys(
+    private_key: str, public_key: str
+) -> tuple[ec.EllipticCurvePrivateKey, str]:
+    if not private_key and settings.WEBPUSH_STUB:
+        private_key, public_key = generate_vapid_keys()
+    return (
+        ec.derive_private_key(
+            int.from_bytes(_b64decode(private_key), "big"), ec.SECP256R1()
+        ),
+        public_key,
+    )
+
+
+def is_push_service(endpoint: str) -> bool:
+    """The endpoint is served by the push service of a browser, the pushes are not sent elsewhere."""
+    url = urlsplit(endpoint)
+    host = (url.hostname or "").lower()
+    return url.scheme == "https" and any(
+        host == allowed or host.endswith(f".{allowed}")
+        for allowed in settings.WEBPUSH_ALLOWED_HOSTS
+    )
+
+
+def is_configured() -> bool:
+    return bool(settings.WEBPUSH_VAPID_PRIVATE_KEY or settings.WEBPUSH_STUB)
+
+
+def _get_headers(audience: str, expires_at: int) -> dict[str, str]:
+    private_key, public_key = _get_vapid_keys(
+        settings.WEBPUSH_VAPID_PRIVATE_KEY, settings.WEBPUSH_VAPID_PUBLIC_KEY
+    )
+    token = jwt.encode(
+        {"aud": audience, "exp": expires_at, "sub": settings.WEBPUSH_VAPID_SUBJECT},
+        private_key,
+        algorithm="ES256",
+    )
+    return {
+        "Authorization": f"vapid t={token}, k={public_key}",
+        "TTL": str(PUSH_TTL),
+        "Urgency": "normal",
+    }
+
+
+def stub_transport(latency: float = 0) -> httpx.AsyncBaseTransport:
+    """Local push service, every push is accepted except on endpoints ending with `/expired`."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        if request.url.path.endswith("/expired"):
+            return httpx.Response(410)
+        return httpx.Response(201)
+
+    return httpx.MockTransport(handler)
+
+
+@dataclass
+class PushResult:
+    """Ids of the subscriptions by outcome."""
+
+    sent: list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+    # the push services do not know these subscriptions anymore
+    expired: list[int] = field(default_factory=list)
+
+
+async def _send_pushes(
+    subscriptions: list[tuple[int, str]],
+    concurrency: int,
+    transport: httpx.AsyncBaseTransport | None,
+) -> PushResult:
+    result = PushResult()
+    expires_at = int(time.time()) + VAPID_TOKEN_LIFETIME
+    # a token for each push service, there are only a few of them
+    headers_by_audience: dict[str, dict[str, str]] = {}
+    pending = iter(subscriptions)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        # the workers share the iterator, at most `concurrency` requests are in flight
+        for subscription_id, endpoint in pending:
+            url = urlsplit(endpoint)
+            audience = f"{url.scheme}://{url.netloc}"
+            if audience not in headers_by_audience:
+                headers_by_audience[audience] = _get_headers(audience, expires_at)
+            try:
+                response = await client.post(
+                    endpoint, headers=headers_by_audience[audience]
+                )
+            except httpx.HTTPError:
+                result.failed.append(subscription_id)
+                continue
+            if response.status_code in EXPIRED_STATUS_CODES:
+                result.expired.append(subscription_id)
+            elif response.is_success:
+                result.sent.append(subscription_id)
+            else:
+                result.failed.append(subscription_id)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        transport=transport, limits=limits, timeout=10
+    ) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return result
+
+
+def send_pushes(
+    subscriptions: list[tuple[int, str]],
+    concurrency: int | None = None,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> PushResult:
+    """Send a push to each (id, endpoint) subscription with a single client."""
+    if not subscriptions:
+        return PushResult()
+    if transport is None and settings.WEBPUSH_STUB:
+        transport = stub_transport()
+    return asyncio.run(
+        _send_pushes(
+            subscriptions,
+            concurrency=concurrency or settings.WEBPUSH_CONCURRENCY,
+            transport=transport,
+        )
+    )
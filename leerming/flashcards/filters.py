@@ -1,11 +1,20 @@
+import json
+import re
+
 from django import forms
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FloatField
 from django.db.models import Q
+from django.db.models.functions import Cast
 from django.db.models.query import QuerySet
 from django.utils.translation import gettext_lazy as _
-from watson import search
 
+from .forms import TopicChoiceField
 from .models import FlashCard
-from leerming.flashcards.models import Topic
+from .models import SEARCH_CONFIG
+from .models import SEARCH_VECTOR
 
 ALL_TOPICS = "ALL_TOPICS"
 NO_TOPIC = "NO_TOPIC"
@@ -13,12 +22,7 @@ ALL_DIFFICULTIES = "ALL_DIFFICULTIES"
 MASTERED_OR_NOT = "MASTERED_OR_NOT"
 NOT_MASTERED = "NOT_MASTERED"
 MASTERED = "MASTERED"
-
-
-def _get_topic_choices(topics: QuerySet[Topic]):
-    return [(ALL_TOPICS, _("Tous les sujets")), (NO_TOPIC, _("Sans sujet"))] + [
-        (topic.id, topic.title) for topic in topics
-    ]
+ORDERING = ("next_review_date", "-created", "-id")
 
 
 def _get_difficulty_choices():
@@ -31,7 +35,9 @@ class FilterForm(forms.Form):
     template_name = "flashcards/filter_form.html"
 
     query = forms.CharField(required=False)
-    topic = forms.ChoiceField()
+    topic = TopicChoiceField(
+        fixed_choices=[(ALL_TOPICS, _("Tous les sujets")), (NO_TOPIC, _("Sans sujet"))]
+    )
     difficulty = forms.ChoiceField()
     next_review_date = forms.DateField(
         required=False, widget=forms.DateInput(attrs={"type": "date"})
@@ -48,9 +54,35 @@ class FilterForm(forms.Form):
         self.request = kwargs.pop("request")
         self.user = self.request.user
         super().__init__(*args, **kwargs)
-        self.fields["topic"].choices = _get_topic_choices(self.user.topics.all())
+        self.fields["topic"].set_owner(self.user.pk, selected=self["topic"].value())
         self.fields["difficulty"].choices = _get_difficulty_choices()
 
+    def get_search_query(self) -> SearchQuery | None:
+        """Every word of the query is matched as a prefix, the list is filtered as the user types."""
+        if not self.is_valid():
+            return None
+        words = re.findall(r"\w+", self.cleaned_data["query"])
+        if not words:
+            return None
+        return SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+
+    def get_ordering(self) -> tuple[str, ...]:
+        if self.get_search_query():
+            return ("-rank", *ORDERING)
+        return ORDERING
+
+    def count(self) -> int:
+        filters = self.cleaned_data if self.is_valid() else {}
+        return FlashCard.get_count(
+            self.filter(),
+            owner_id=self.user.pk,
+            filters=json.dumps(filters, sort_keys=True, cls=DjangoJSONEncoder),
+        )
+
     def filter(self) -> QuerySet[FlashCard]:
         queryset = self.user.flashcards.select_related("topic")
         if not self.is_valid():
@@ -61,8 +93,14 @@ class FilterForm(forms.Form):
         next_review_date = self.cleaned_data["next_review_date"]
         mastered = self.cleaned_data["mastered"]
 
-        if query := self.cleaned_data["query"]:
-            queryset = search.filter(queryset, query)
+        if search_query := self.get_search_query():
+            queryset = (
+                queryset.alias(search=SEARCH_VECTOR).filter(search=search_query)
+                # ts_rank is a real, as a double it is exactly the value of the cursors
+                .annotate(
+                    rank=Cast(SearchRank(SEARCH_VECTOR, search_query), FloatField())
+                )
+            )
         if next_review_date:
             queryset = queryset.filter(next_review_date=next_review_date)
 
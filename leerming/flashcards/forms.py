@@ -1,20 +1,64 @@
 from django import forms
 from django.db import models
+from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 
 from .models import FlashCard
 from .models import Topic
 
 
-class NoValidationChoiceField(forms.ChoiceField):
+def _parse_topic_id(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class TopicChoiceField(forms.ChoiceField):
+    """
+    Only the fixed choices and the selected topic are rendered, the tom-select widget searches the
+    other topics with `flashcards:topics`. A topic id is checked against the cached topics of the owner.
+    """
+
+    def __init__(self, *, fixed_choices=(), **kwargs):
+        kwargs.setdefault(
+            "widget",
+            forms.Select(
+                attrs={
+                    "class": "tom-select",
+                    "data-url": reverse_lazy("flashcards:topics"),
+                }
+            ),
+        )
+        super().__init__(choices=fixed_choices, **kwargs)
+        self.fixed_choices = list(fixed_choices)
+        self.owner_id = None
+
+    def set_owner(self, owner_id: int, selected=None) -> None:
+        self.owner_id = owner_id
+        titles = Topic.get_titles(owner_id)
+        choices = list(self.fixed_choices)
+        if (topic_id := _parse_topic_id(selected)) in titles:
+            choices.append((topic_id, titles[topic_id]))
+        self.choices = choices
+
+    def valid_value(self, value) -> bool:
+        return super().valid_value(value) or (
+            _parse_topic_id(value) in Topic.get_titles(self.owner_id)
+        )
+
+
+class CreatableTopicChoiceField(TopicChoiceField):
+    """Also accepts the title of a new topic, the form creates it."""
+
     def validate(self, value):
         pass
 
 
 class FlashCardForm(forms.ModelForm):
-    topic = NoValidationChoiceField(
+    topic = CreatableTopicChoiceField(
         label=_("Sujet"),
-        widget=forms.Select(attrs={"class": "tom-select"}),
+        fixed_choices=[(None, _("Aucun"))],
         required=False,
         help_text=_(
             "Si le sujet n'existe pas, soyer certain de cliquer sur ajouter/entrée pour qu'il soit créé"
@@ -32,20 +76,18 @@ class FlashCardForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         self.request = kwargs.pop("request")
         super().__init__(*args, **kwargs)
-        self.fields["topic"].choices = [(None, _("Aucun"))] + [
-            (t.id, t.title) for t in Topic.objects.filter(created_by=self.request.user)
-        ]
+        self.fields["topic"].set_owner(
+            self.request.user.pk, selected=self["topic"].value()
+        )
 
     def clean_topic(self):
         if topic := self.cleaned_data.pop("topic"):
-            try:
-                topic_id = int(topic)
-            except ValueError:
-                topic, _ = Topic.objects.get_or_create(
+            if (topic_id := _parse_topic_id(topic)) is None:
+                topic, _created = Topic.objects.get_or_create(
                     title=topic.capitalize(), created_by=self.request.user
                 )
-            else:
-                topic = Topic.objects.get(id=topic_id)
+            elif not (topic := self.request.user.topics.filter(id=topic_id).first()):
+                raise forms.ValidationError(_("Ce sujet n'existe pas."))
             return topic
         return None
 
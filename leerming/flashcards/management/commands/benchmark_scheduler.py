@@ -0,0 +1,72 @@
+import datetime as dt
+import random
+import timeit
+import zoneinfo
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from leerming.flashcards.scheduling import LEVEL_TO_DAYS_MAP
+from leerming.flashcards.scheduling import ReviewCalendar
+
+
+def _day_by_day_next_review_date(
+    review_days: list[int],
+    review_time: dt.time,
+    timezone_name: str,
+    from_date: dt.date,
+) -> dt.date:
+    """The one card at a time scan the scheduler replaced, kept as the benchmark baseline."""
+    from_date = max(from_date, timezone.now().date())
+    next_weekday = next(
+        (weekday for weekday in review_days if weekday >= from_date.weekday()),
+        review_days[0],
+    )
+    next_review_date = from_date
+    while next_review_date.weekday() != next_weekday:
+        next_review_date += dt.timedelta(days=1)
+    next_run = timezone.make_aware(
+        dt.datetime.combine(next_review_date, review_time),
+        zoneinfo.ZoneInfo(timezone_name),
+    )
+    return timezone.make_naive(next_run, timezone.get_default_timezone()).date()
+
+
+class Command(BaseCommand):
+    help = "Compare the review calendar with the day by day scan of next review dates"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=300)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--timezone", default="Europe/Paris")
+
+    def handle(self, *args, **options):
+        review_days = [0, 2, 4]
+        review_time = dt.time(18)
+        timezone_name = options["timezone"]
+        today = timezone.now().date()
+        levels = [random.randint(1, 7) for _ in range(options["cards"])]  # noqa: S311
+
+        def day_by_day():
+            return [
+                _day_by_day_next_review_date(
+                    review_days,
+                    review_time,
+                    timezone_name,
+                    today + dt.timedelta(days=LEVEL_TO_DAYS_MAP[level]),
+                )
+                for level in levels
+            ]
+
+        def calendar():
+            return ReviewCalendar.get(
+                review_days, review_time, timezone_name
+            ).next_review_dates(levels, for_date=today)
+
+        if day_by_day() != calendar():
+            self.stderr.write(self.style.ERROR("The schedulers results differ"))
+            return
+
+        for name, func in (("day by day", day_by_day), ("calendar", calendar)):
+            best = min(timeit.repeat(func, number=1, repeat=options["repeat"]))
+            self.stdout.write(f"{name}: {best * 1000:.3f} ms for {len(levels)} cards")
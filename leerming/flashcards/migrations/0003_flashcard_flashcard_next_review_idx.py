@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:50
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=models.Index(
+                fields=["owner", "next_review_date"], name="flashcard_next_review_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.6 on 2026-10-18 11:10
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0003_flashcard_flashcard_next_review_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="flashcard",
+            name="flashcard_next_review_idx",
+        ),
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=models.Index(
+                models.F("owner"),
+                models.OrderBy(models.F("next_review_date"), nulls_first=True),
+                models.OrderBy(models.F("created"), descending=True),
+                models.OrderBy(models.F("id"), descending=True),
+                name="flashcard_list_idx",
+            ),
+        ),
+    ]
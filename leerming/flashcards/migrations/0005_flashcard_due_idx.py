@@ -0,0 +1,26 @@
+# Generated by Django 4.2.6 on 2026-10-18 11:12
+import datetime
+
+import django.db.models.functions.comparison
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0004_flashcard_list_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=models.Index(
+                models.F("owner"),
+                django.db.models.functions.comparison.Coalesce(
+                    "next_review_date", models.Value(datetime.date(1, 1, 1))
+                ),
+                condition=models.Q(("mastered_at__isnull", True)),
+                name="flashcard_due_idx",
+            ),
+        ),
+    ]
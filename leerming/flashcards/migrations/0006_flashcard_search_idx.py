@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 11:13
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0005_flashcard_due_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.search.SearchVector(
+                    "question", "answer", config="french"
+                ),
+                name="flashcard_search_idx",
+            ),
+        ),
+    ]
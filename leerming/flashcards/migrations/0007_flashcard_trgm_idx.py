@@ -0,0 +1,30 @@
+# Generated by Django 4.2.6 on 2026-10-18 11:14
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0006_flashcard_search_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["question"],
+                name="flashcard_question_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flashcard",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["answer"],
+                name="flashcard_answer_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
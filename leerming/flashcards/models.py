@@ -1,14 +1,43 @@
+from __future__ import annotations
+
 import datetime as dt
+import hashlib
+import uuid
+from typing import TYPE_CHECKING
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.query import QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from django_lifecycle import AFTER_CREATE
+from django_lifecycle import AFTER_DELETE
+from django_lifecycle import AFTER_SAVE
+from django_lifecycle import AFTER_UPDATE
+from django_lifecycle import hook
+from django_lifecycle import LifecycleModelMixin
 from model_utils.models import TimeStampedModel
 
+from .scheduling import LEVEL_TO_DAYS_MAP
+
+if TYPE_CHECKING:
+    from leerming.profiles.models import Profile
+
+# seconds, the counts and the topics are cleared when they change
+CACHE_TIMEOUT = 60 * 60 * 24
+# the new cards have no next review date, they are due on any date
+DUE_DATE = Coalesce("next_review_date", models.Value(dt.date.min))
+SEARCH_CONFIG = "french"
+# computed by postgres on the fly, the index is kept up to date even by the bulk inserts
+SEARCH_VECTOR = SearchVector("question", "answer", config=SEARCH_CONFIG)
+
 
-class Topic(TimeStampedModel):
+class Topic(LifecycleModelMixin, TimeStampedModel):
     created_by = models.ForeignKey(
         "users.User", on_delete=models.CASCADE, related_name="topics"
     )
@@ -28,17 +57,66 @@ class Topic(TimeStampedModel):
     def __str__(self) -> str:
         return self.title
 
+    @hook(AFTER_CREATE)
+    @hook(AFTER_UPDATE, when="title", has_changed=True)
+    @hook(AFTER_DELETE)
+    def clear_creator_topics(self):
+        Topic.clear_cache(self.created_by_id)
 
-class FlashCard(TimeStampedModel):
-    LEVEL_TO_DAYS_MAP = {
-        1: 1,
-        2: 2,
-        3: 4,
-        4: 7,
-        5: 15,
-        6: 30,
-        7: 60,
-    }
+    @hook(AFTER_DELETE)
+    def clear_creator_counts(self):
+        # the flashcards of the topic are deleted with it
+        FlashCard.clear_counts(self.created_by_id)
+
+    @staticmethod
+    def _get_cache_version_key(owner_id: int) -> str:
+        return f"topics_version_{owner_id}"
+
+    @classmethod
+    def get_titles(cls, owner_id: int) -> dict[int, str]:
+        """The titles of the topics of the owner by id, cached until one of them is created, renamed
+        or deleted. Clearing the cache of an owner only changes the version in the key.
+        """
+        version = cache.get_or_set(
+            cls._get_cache_version_key(owner_id), lambda: uuid.uuid4().hex, timeout=None
+        )
+        key = f"topics_{owner_id}_{version}"
+        topics = cache.get(key)
+        if topics is None:
+            topics = list(
+                cls.objects.filter(created_by_id=owner_id)
+                .order_by("title")
+                .values_list("id", "title")
+            )
+            cache.set(key, topics, timeout=CACHE_TIMEOUT)
+        return dict(topics)
+
+    @classmethod
+    def clear_cache(cls, owner_id: int) -> None:
+        cache.delete(cls._get_cache_version_key(owner_id))
+
+
+class FlashCardDisplayMixin:
+    """How a card is shown to the reviewer, from its question, answer and card type."""
+
+    question: str
+    answer: str
+    card_type: str
+
+    def __str__(self):
+        if self.card_type == FlashCard.CardType.FRONT_BACK:
+            return self.question
+        return self.question.replace(self.answer, "[...]")
+
+    @property
+    def answer_display(self) -> str:
+        if self.card_type == FlashCard.CardType.FRONT_BACK:
+            return self.answer
+        return self.question
+
+
+class FlashCard(LifecycleModelMixin, FlashCardDisplayMixin, TimeStampedModel):
+    LEVEL_TO_DAYS_MAP = LEVEL_TO_DAYS_MAP
 
     DIFFICULTY_TO_LEVEL_MAP = {
         "EASY": (5, 6, 7),
@@ -104,46 +182,140 @@ class FlashCard(TimeStampedModel):
                 fields=["owner", "question", "answer"], name="unique_flashcard"
             )
         ]
+        indexes = [
+            # the ordering of the flashcards list
+            models.Index(
+                models.F("owner"),
+                models.F("next_review_date").asc(nulls_first=True),
+                models.F("created").desc(),
+                models.F("id").desc(),
+                name="flashcard_list_idx",
+            ),
+            # a single range scan for the cards to review, see `Review.filter_flashcards_to_review`
+            models.Index(
+                models.F("owner"),
+                DUE_DATE,
+                condition=models.Q(mastered_at__isnull=True),
+                name="flashcard_due_idx",
+            ),
+            GinIndex(SEARCH_VECTOR, name="flashcard_search_idx"),
+            # the typeahead of the flashcards list
+            GinIndex(
+                fields=["question"],
+                opclasses=["gin_trgm_ops"],
+                name="flashcard_question_trgm_idx",
+            ),
+            GinIndex(
+                fields=["answer"],
+                opclasses=["gin_trgm_ops"],
+                name="flashcard_answer_trgm_idx",
+            ),
+        ]
 
-    def __str__(self):
-        if self.card_type == self.CardType.FRONT_BACK:
-            return self.question
-        return self.question.replace(self.answer, "[...]")
-
-    @property
-    def answer_display(self) -> str:
-        if self.card_type == self.CardType.FRONT_BACK:
-            return self.answer
-        return self.question
+    @hook(AFTER_SAVE)
+    @hook(AFTER_DELETE)
+    def clear_owner_counts(self):
+        FlashCard.clear_counts(self.owner_id)
 
     def update_level_from_difficulty(self) -> None:
         # when user manually change the difficulty
         self.level = self.DIFFICULTY_TO_LEVEL_MAP.get(self.difficulty)[0]
-        review_interval = dt.timedelta(days=self.LEVEL_TO_DAYS_MAP[self.level])
         # would be even better if the from_date was the user last_review date
-        self.next_review_date = self.owner.profile.get_next_review_datetime(
-            from_date=timezone.now().date() + review_interval, include_from_date=True
+        self.next_review_date = self.owner.profile.review_calendar.next_review_date(
+            self.level, for_date=timezone.now().date()
         )
         self.save()
 
     def review(self, correct_answer: bool, for_date: dt.date) -> None:
-        if self.mastered_at:
+        if not self.grade(correct_answer, for_date=for_date):
             return
+        if not self.mastered_at:
+            self.next_review_date = self.owner.profile.review_calendar.next_review_date(
+                self.level, for_date=for_date
+            )
+        self.save()
+
+    def grade(self, correct_answer: bool, for_date: dt.date) -> bool:
+        """Apply a review answer to the level of the card in memory, the next review date
+        is left to the caller. Return False when the card was already mastered."""
+        if self.mastered_at:
+            return False
         if correct_answer and self.level < 7:
             self.level += 1
         elif correct_answer and self.level == 7:
             self.mastered_at = for_date
             self.next_review_date = None
-            self.save()
-            return
+            return True
         else:
             self.level = 1
-        review_interval = dt.timedelta(days=self.LEVEL_TO_DAYS_MAP[self.level])
         self.difficulty = FlashCard.get_difficulty_for(self.level)
-        self.next_review_date = self.owner.profile.get_next_review_datetime(
-            from_date=for_date + review_interval, include_from_date=True
+        return True
+
+    @classmethod
+    def bulk_review(
+        cls,
+        flashcards: list[FlashCard],
+        answers: dict[int, bool],
+        for_date: dt.date,
+        profile: Profile,
+    ) -> None:
+        """Same as calling `review` on each flashcard, but with a single update query."""
+        now = timezone.now()
+        reviewed_flashcards = []
+        for flashcard in flashcards:
+            if flashcard.grade(answers[flashcard.id], for_date=for_date):
+                # bulk_update does not touch the auto updated field
+                flashcard.modified = now
+                reviewed_flashcards.append(flashcard)
+
+        flashcards_to_schedule = [f for f in reviewed_flashcards if not f.mastered_at]
+        next_review_dates = profile.review_calendar.next_review_dates(
+            [flashcard.level for flashcard in flashcards_to_schedule], for_date=for_date
         )
-        self.save()
+        for flashcard, next_review_date in zip(
+            flashcards_to_schedule, next_review_dates, strict=True
+        ):
+            flashcard.next_review_date = next_review_date
+
+        cls.objects.bulk_update(
+            reviewed_flashcards,
+            fields=(
+                "level",
+                "difficulty",
+                "mastered_at",
+                "next_review_date",
+                "modified",
+            ),
+        )
+        # bulk_update does not run the hooks either
+        cls.clear_counts(profile.user_id)
+
+    @staticmethod
+    def _get_count_version_key(owner_id: int) -> str:
+        return f"flashcards_count_version_{owner_id}"
+
+    @classmethod
+    def get_count(
+        cls, queryset: QuerySet[FlashCard], owner_id: int, filters: str
+    ) -> int:
+        """
+        Number of flashcards of the queryset, cached by owner and filters until one of the flashcards
+        of the owner changes. Clearing the counts of an owner only changes the version in their keys.
+        """
+        version = cache.get_or_set(
+            cls._get_count_version_key(owner_id), lambda: uuid.uuid4().hex, timeout=None
+        )
+        digest = hashlib.sha256(filters.encode()).hexdigest()
+        key = f"flashcards_count_{owner_id}_{version}_{digest}"
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, timeout=CACHE_TIMEOUT)
+        return count
+
+    @classmethod
+    def clear_counts(cls, owner_id: int) -> None:
+        cache.delete(cls._get_count_version_key(owner_id))
 
     @staticmethod
     def get_difficulty_for(level) -> str:
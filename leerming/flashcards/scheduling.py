@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import datetime as dt
+import zoneinfo
+from collections.abc import Sequence
+from functools import lru_cache
+
+from django.utils import timezone
+
+LEVEL_TO_DAYS_MAP = {
+    1: 1,
+    2: 2,
+    3: 4,
+    4: 7,
+    5: 15,
+    6: 30,
+    7: 60,
+}
+
+
+class ReviewCalendar:
+    """
+    Compute the next review dates of a reviewer from lookup tables built once from the review days,
+    instead of scanning the calendar one day at a time for every flashcard.
+    """
+
+    def __init__(
+        self, review_days: Sequence[int], review_time: dt.time, timezone_name: str
+    ):
+        self.review_time = review_time
+        self.tzinfo = zoneinfo.ZoneInfo(timezone_name)
+        # number of days to wait from a weekday to reach a review day, the weekday itself included
+        self.days_until_review_day = tuple(
+            min((review_day - weekday) % 7 for review_day in review_days)
+            for weekday in range(7)
+        )
+        # 7x7 table, number of days to wait from a weekday (column) for a card at a given level (row)
+        self.days_until_next_review = {
+            level: tuple(
+                interval + self.days_until_review_day[(weekday + interval) % 7]
+                for weekday in range(7)
+            )
+            for level, interval in LEVEL_TO_DAYS_MAP.items()
+        }
+
+    @classmethod
+    def get(
+        cls, review_days: Sequence[int], review_time: dt.time, timezone_name: str
+    ) -> ReviewCalendar:
+        return _get_calendar(tuple(review_days), review_time, timezone_name)
+
+    def next_review_day(
+        self, from_date: dt.date, include_from_date: bool = False
+    ) -> dt.date:
+        if not include_from_date:
+            from_date += dt.timedelta(days=1)
+        return from_date + dt.timedelta(
+            days=self.days_until_review_day[from_date.weekday()]
+        )
+
+    def review_datetime(self, review_day: dt.date) -> dt.datetime:
+        return timezone.make_aware(
+            dt.datetime.combine(review_day, self.review_time), self.tzinfo
+        )
+
+    def next_review_datetime_after(self, moment: dt.datetime) -> dt.datetime:
+        """First review datetime strictly after `moment`."""
+        local_date = timezone.localtime(moment, self.tzinfo).date()
+        review_datetime = self.review_datetime(
+            self.next_review_day(local_date, include_from_date=True)
+        )
+        if review_datetime <= moment:
+            review_datetime = self.review_datetime(self.next_review_day(local_date))
+        return review_datetime
+
+    def next_review_date(self, level: int, for_date: dt.date) -> dt.date:
+        return self.next_review_dates([level], for_date=for_date)[0]
+
+    def next_review_dates(
+        self, levels: Sequence[int], for_date: dt.date
+    ) -> list[dt.date]:
+        """Next review dates of cards reviewed on `for_date` and now at the given levels.
+        The dates are the ones of the review datetimes in the default timezone, this is what
+        `next_review_date` ends up storing when given the result of `get_next_review_datetime`.
+        """
+        today = timezone.now().date()
+        if for_date >= today - dt.timedelta(days=1):
+            # the date after the review interval is never in the past, the table can be used
+            weekday = for_date.weekday()
+            review_days = [
+                for_date
+                + dt.timedelta(days=self.days_until_next_review[level][weekday])
+                for level in levels
+            ]
+        else:
+            review_days = [
+                self.next_review_day(
+                    max(for_date + dt.timedelta(days=LEVEL_TO_DAYS_MAP[level]), today),
+                    include_from_date=True,
+                )
+                for level in levels
+            ]
+
+        default_timezone = timezone.get_default_timezone()
+        # there is at most one distinct review day per level
+        review_dates = {
+            review_day: timezone.make_naive(
+                self.review_datetime(review_day), default_timezone
+            ).date()
+            for review_day in set(review_days)
+        }
+        return [review_dates[review_day] for review_day in review_days]
+
+
+@lru_cache(maxsize=1024)
+def _get_calendar(
+    review_days: tuple[int, ...], review_time: dt.time, timezone_name: str
+) -> ReviewCalendar:
+    return ReviewCalendar(review_days, review_time, timezone_name)
@@ -0,0 +1,172 @@
+import datetime as dt
+import itertools
+import zoneinfo
+
+import pytest
+from django.utils import timezone
+
+from leerming.flashcards.scheduling import LEVEL_TO_DAYS_MAP
+from leerming.flashcards.scheduling import ReviewCalendar
+
+ALL_REVIEW_DAYS = [
+    list(review_days)
+    for size in range(1, 8)
+    for review_days in itertools.combinations(range(7), size)
+]
+REVIEW_TIME = dt.time(18)
+UTC = zoneinfo.ZoneInfo("UTC")
+
+
+def _day_by_day_next_review_datetime(
+    review_days: list[int],
+    review_time: dt.time,
+    timezone_name: str,
+    from_date: dt.date,
+    include_from_date: bool = False,
+) -> dt.datetime:
+    """The day by day scan of `Profile.get_next_review_datetime` the calendar replaced."""
+    from_date = max(from_date, timezone.now().date())
+    if include_from_date:
+        next_weekday = next(
+            (weekday for weekday in review_days if weekday >= from_date.weekday()),
+            review_days[0],
+        )
+        next_review_date = from_date
+    else:
+        next_weekday = next(
+            (weekday for weekday in review_days if weekday > from_date.weekday()),
+            review_days[0],
+        )
+        next_review_date = from_date + dt.timedelta(days=1)
+    while next_review_date.weekday() != next_weekday:
+        next_review_date += dt.timedelta(days=1)
+    return timezone.make_aware(
+        dt.datetime.combine(next_review_date, review_time),
+        zoneinfo.ZoneInfo(timezone_name),
+    )
+
+
+@pytest.mark.parametrize("include_from_date", [True, False])
+@pytest.mark.parametrize("review_days", ALL_REVIEW_DAYS, ids=str)
+def test_next_review_day_matches_the_day_by_day_scan(review_days, include_from_date):
+    calendar = ReviewCalendar(review_days, REVIEW_TIME, "Europe/Paris")
+    today = timezone.now().date()
+
+    # two weeks from every weekday, the review days of the next week included
+    for from_date in (today + dt.timedelta(days=i) for i in range(14)):
+        expected = _day_by_day_next_review_datetime(
+            review_days, REVIEW_TIME, "Europe/Paris", from_date, include_from_date
+        )
+        review_day = calendar.next_review_day(from_date, include_from_date)
+        assert calendar.review_datetime(review_day) == expected
+
+
+@pytest.mark.parametrize("timezone_name", ["UTC", "Europe/Paris", "Pacific/Auckland"])
+@pytest.mark.parametrize("review_days", ALL_REVIEW_DAYS, ids=str)
+def test_next_review_dates_match_the_day_by_day_scan(
+    settings, review_days, timezone_name
+):
+    settings.TIME_ZONE = "America/New_York"
+    calendar = ReviewCalendar(review_days, dt.time(23, 30), timezone_name)
+    today = timezone.now().date()
+    levels = list(LEVEL_TO_DAYS_MAP)
+
+    # the recent dates use the table, the older ones are brought back to today
+    for for_date in (today + dt.timedelta(days=i) for i in range(-20, 8)):
+        expected = [
+            timezone.make_naive(
+                _day_by_day_next_review_datetime(
+                    review_days,
+                    dt.time(23, 30),
+                    timezone_name,
+                    for_date + dt.timedelta(days=LEVEL_TO_DAYS_MAP[level]),
+                    include_from_date=True,
+                )
+            ).date()
+            for level in levels
+        ]
+        assert calendar.next_review_dates(levels, for_date=for_date) == expected
+
+
+@pytest.mark.parametrize(
+    ("timezone_name", "expected"),
+    [
+        # sunday 19:30, the review of the evening
+        ("America/New_York", dt.datetime(2026, 10, 19, 0, 0, tzinfo=UTC)),
+        # already monday 08:30, the review of the next sunday
+        ("Asia/Tokyo", dt.datetime(2026, 10, 25, 11, 0, tzinfo=UTC)),
+    ],
+)
+def test_next_review_datetime_after_in_the_timezone_of_the_reviewer(
+    timezone_name, expected
+):
+    calendar = ReviewCalendar([6], dt.time(20), timezone_name)
+
+    moment = dt.datetime(2026, 10, 18, 23, 30, tzinfo=UTC)
+
+    assert calendar.next_review_datetime_after(moment) == expected
+
+
+def test_next_review_datetime_after_is_strictly_after():
+    calendar = ReviewCalendar([6], dt.time(20), "Europe/Paris")
+    review_datetime = calendar.review_datetime(dt.date(2026, 10, 18))
+
+    next_review_datetime = calendar.next_review_datetime_after(review_datetime)
+
+    assert next_review_datetime == calendar.review_datetime(dt.date(2026, 10, 25))
+
+
+@pytest.mark.parametrize(
+    ("timezone_name", "moment", "expected", "hours"),
+    [
+        # the clocks go forward on sunday 29 march in Paris
+        (
+            "Europe/Paris",
+            dt.datetime(2026, 3, 28, 17, 0, tzinfo=UTC),
+            dt.datetime(2026, 3, 29, 16, 0, tzinfo=UTC),
+            23,
+        ),
+        # and back on sunday 25 october
+        (
+            "Europe/Paris",
+            dt.datetime(2026, 10, 24, 16, 0, tzinfo=UTC),
+            dt.datetime(2026, 10, 25, 17, 0, tzinfo=UTC),
+            25,
+        ),
+        # on sunday 1st november in New York
+        (
+            "America/New_York",
+            dt.datetime(2026, 10, 31, 22, 0, tzinfo=UTC),
+            dt.datetime(2026, 11, 1, 23, 0, tzinfo=UTC),
+            25,
+        ),
+    ],
+)
+def test_next_review_datetime_after_across_a_dst_change(
+    timezone_name, moment, expected, hours
+):
+    calendar = ReviewCalendar([5, 6], dt.time(18), timezone_name)
+
+    next_review_datetime = calendar.next_review_datetime_after(moment)
+
+    assert next_review_datetime == expected
+    assert next_review_datetime - moment == dt.timedelta(hours=hours)
+    local = timezone.localtime(next_review_datetime, zoneinfo.ZoneInfo(timezone_name))
+    assert local.time() == dt.time(18)
+
+
+def test_next_review_datetime_after_a_review_time_skipped_by_dst():
+    # 02:30 does not exist on sunday 29 march in Paris, the review is at 03:30
+    calendar = ReviewCalendar([6], dt.time(2, 30), "Europe/Paris")
+
+    next_review_datetime = calendar.next_review_datetime_after(
+        dt.datetime(2026, 3, 28, 12, 0, tzinfo=UTC)
+    )
+
+    # the times in a gap are never equal to another timezone, they are compared in UTC
+    assert next_review_datetime.astimezone(UTC) == dt.datetime(
+        2026, 3, 29, 1, 30, tzinfo=UTC
+    )
+    assert calendar.next_review_datetime_after(next_review_datetime) == dt.datetime(
+        2026, 4, 5, 0, 30, tzinfo=UTC
+    )
@@ -6,6 +6,8 @@ app_name = "flashcards"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("typeahead/", views.typeahead, name="typeahead"),
+    path("topics/", views.topics, name="topics"),
     path("create/", views.create, name="create"),
     path(
         "create-from-document/", views.create_from_document, name="create_from_document"
@@ -1,7 +1,9 @@
-from django.core.paginator import Paginator
-from django.db import models
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q
+from django.db.models.functions import Greatest
 from django.http import Http404
 from django.http import HttpRequest
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
@@ -9,6 +11,7 @@ from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django_htmx.http import HttpResponseClientRedirect
 
+from ..core.pagination import paginate_by_keyset
 from ..documents.models import UploadedDocument
 from .filters import FilterForm
 from .forms import FlashCardCreateForm
@@ -23,29 +26,70 @@ from .models import FlashCard
 from .models import Topic
 
 
+FLASHCARDS_PER_PAGE = 12
+TYPEAHEAD_LIMIT = 5
+# shorter queries have too few trigrams to be selective
+TYPEAHEAD_MIN_LENGTH = 3
+TOPICS_SEARCH_LIMIT = 20
+
+
 def index(request: HttpRequest):
     form = FilterForm(request.GET or None, request=request)
-    flashcards = form.filter()
-    flashcards = flashcards.order_by(
-        models.F("next_review_date").asc(nulls_first=True), "-created"
+    page = paginate_by_keyset(
+        form.filter(),
+        ordering=form.get_ordering(),
+        per_page=FLASHCARDS_PER_PAGE,
+        after=request.GET.get("after"),
     )
-    paginator = Paginator(flashcards, 12)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    if request.htmx and "after" in request.GET:
+        # the next cards of the infinite list, the count is already shown
+        return TemplateResponse(request, "flashcards/index.html#cards", {"page": page})
+
     template_name = (
         "flashcards/index.html#flashcards" if request.htmx else "flashcards/index.html"
     )
     return TemplateResponse(
         request,
         template_name,
-        {
-            "page_obj": page_obj,
-            "total_count": flashcards.count(),
-            "form": form,
-        },
+        {"page": page, "total_count": form.count(), "form": form},
+    )
+
+
+def typeahead(request: HttpRequest):
+    """The cards closest to the query, a single lookup of the trigram indexes for each keystroke."""
+    query = request.GET.get("query", "").strip()
+    flashcards = []
+    if len(query) >= TYPEAHEAD_MIN_LENGTH:
+        flashcards = (
+            request.user.flashcards.filter(
+                Q(question__trigram_word_similar=query)
+                | Q(answer__trigram_word_similar=query)
+            )
+            .annotate(
+                similarity=Greatest(
+                    TrigramWordSimilarity(query, "question"),
+                    TrigramWordSimilarity(query, "answer"),
+                )
+            )
+            .select_related("topic")
+            .order_by("-similarity", "-id")[:TYPEAHEAD_LIMIT]
+        )
+    return TemplateResponse(
+        request, "flashcards/index.html#typeahead", {"flashcards": flashcards}
     )
 
 
+def topics(request: HttpRequest):
+    """Search of the topics for the tom-select widgets, in the cached topics of the user."""
+    query = request.GET.get("q", "").casefold()
+    matches = [
+        {"value": topic_id, "text": title}
+        for topic_id, title in Topic.get_titles(request.user.pk).items()
+        if query in title.casefold()
+    ]
+    return JsonResponse({"topics": matches[:TOPICS_SEARCH_LIMIT]})
+
+
 def create(request: HttpRequest):
     form = FlashCardCreateForm(request.POST or None, request=request)
     if request.method == "POST" and form.is_valid():
@@ -176,5 +220,6 @@ def save_llm_flashcards(request: HttpRequest):
             f.topic = topic
 
     FlashCard.objects.bulk_create(db_flashcards, ignore_conflicts=True)
+    FlashCard.clear_counts(request.user.pk)
     delete_llm_flashcards_from_session(request)
     return redirect("flashcards:index")
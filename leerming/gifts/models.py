@@ -49,6 +49,7 @@ class Gift(TimeStampedModel):
             ),
             ignore_conflicts=True,
         )
+        Topic.clear_cache(self.recipient_id)
         # for some reason the return values of the bulk create does not have ids
         db_topics = list(
             Topic.objects.filter(
@@ -66,6 +67,7 @@ class Gift(TimeStampedModel):
             for flashcard in self.flashcards
         ]
         FlashCard.objects.bulk_create(unsaved_flashcards, ignore_conflicts=True)
+        FlashCard.clear_counts(self.recipient_id)
         self.opened_at = timezone.now()
         self.save()
 
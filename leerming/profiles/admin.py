@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Profile
+from .models import PushSubscription
 
 
 @admin.action(description="Register selected profiles for next review")
@@ -30,3 +31,10 @@ class ProfileAdmin(admin.ModelAdmin):
         "email_notifications_enabled",
     )
     actions = [register_for_next_review]
+
+
+@admin.register(PushSubscription)
+class PushSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ("id", "profile", "endpoint", "created", "modified")
+    list_filter = ("created", "modified")
+    raw_id_fields = ("profile",)
@@ -22,3 +22,11 @@ class ProfilesConfig(AppConfig):
                     schedule_type="D",
                     next_run=tomorrow,
                 )
+
+            with suppress(IntegrityError):
+                schedule(
+                    "leerming.profiles.tasks.dispatch_due_reviews",
+                    name="dispatch_due_reviews",
+                    schedule_type="I",
+                    minutes=1,
+                )
@@ -42,4 +42,5 @@ class ProfileEditForm(ProfileForm):
             "short_name",
             "full_name",
             "email_notifications_enabled",
+            "max_cards_per_review",
         ]
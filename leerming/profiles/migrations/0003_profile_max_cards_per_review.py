@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:50
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="max_cards_per_review",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Les cartes les plus en retard sont révisées en premier, les autres sont gardées pour les jours suivants.",
+                null=True,
+                verbose_name="Nombre maximum de cartes par révision",
+            ),
+        ),
+    ]
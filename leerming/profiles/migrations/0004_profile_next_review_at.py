@@ -0,0 +1,19 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:57
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("profiles", "0003_profile_max_cards_per_review"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="next_review_at",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+    ]
@@ -13,8 +13,8 @@ from django_lifecycle import hook
 from django_lifecycle import LifecycleModelMixin
 from model_utils.models import TimeStampedModel
 
+from leerming.flashcards.scheduling import ReviewCalendar
 from leerming.reviews.models import Review
-from leerming.reviews.models import ScheduleManager
 
 
 TIMEZONES_CHOICES = [(tz, tz) for tz in zoneinfo.available_timezones()]
@@ -51,6 +51,18 @@ class Profile(LifecycleModelMixin, TimeStampedModel):
     email_notifications_enabled = models.BooleanField(
         default=True, verbose_name=_("Notifications par email")
     )
+    max_cards_per_review = models.PositiveIntegerField(
+        verbose_name=_("Nombre maximum de cartes par révision"),
+        blank=True,
+        null=True,
+        help_text=_(
+            "Les cartes les plus en retard sont révisées en premier, les autres sont gardées pour les jours suivants."
+        ),
+    )
+    # when the reviewer will be notified of the next review, see `dispatch_due_reviews`
+    next_review_at = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
 
     def __str__(self):
         return self.full_name or self.short_name or f"Profile of {self.user}"
@@ -62,37 +74,21 @@ class Profile(LifecycleModelMixin, TimeStampedModel):
     def is_in_review_days(self, day: Weekday) -> bool:
         return day in self.review_days
 
+    @property
+    def review_calendar(self) -> ReviewCalendar:
+        return ReviewCalendar.get(self.review_days, self.review_time, self.timezone)
+
     def get_next_review_datetime(
         self, from_date: dt.date | None = None, include_from_date: bool = False
     ) -> dt.datetime:
         # prevent the function to return dates in the past
         today = timezone.now().date()
         from_date = max(from_date, today)
-
-        if include_from_date:
-            condition_check = (  # noqa E731
-                lambda weekday: weekday >= from_date.weekday()
-            )
-        else:
-            condition_check = lambda weekday: weekday > from_date.weekday()  # noqa E731
-
-        next_weekday = next(
-            (weekday for weekday in self.review_days if condition_check(weekday)),
-            self.review_days[0],
+        review_calendar = self.review_calendar
+        return review_calendar.review_datetime(
+            review_calendar.next_review_day(from_date, include_from_date)
         )
 
-        if include_from_date:
-            next_review_date = from_date
-        else:
-            next_review_date = from_date + dt.timedelta(days=1)
-
-        # loop until we find a day that matches the next_weekday
-        while next_review_date.weekday() != next_weekday:
-            next_review_date += dt.timedelta(days=1)
-
-        next_run = dt.datetime.combine(next_review_date, self.review_time)
-        return timezone.make_aware(next_run, zoneinfo.ZoneInfo(self.timezone))
-
     @hook(BEFORE_SAVE)
     def sort_review_days(self):
         self.review_days = sorted(self.review_days)
@@ -103,17 +99,47 @@ class Profile(LifecycleModelMixin, TimeStampedModel):
         has_changed=True,
     )
     def update_scheduler(self):
-        ScheduleManager.remove(reviewer=self.user)
         self.register_for_next_review()
 
+    @hook(AFTER_UPDATE)
+    def clear_review_status(self):
+        Review.clear_status(self.user_id)
+
     @hook(AFTER_CREATE)
     def register_for_next_review(self):
+        next_review_datetime = self.get_next_review_datetime_after(
+            last_review_date=Review.get_last_review_date(reviewer=self.user)
+        )
+        # saved with an update to not run the hooks again
+        Profile.objects.filter(pk=self.pk).update(next_review_at=next_review_datetime)
+        self.next_review_at = next_review_datetime
+
+    def get_next_review_datetime_after(
+        self, last_review_date: dt.date | None
+    ) -> dt.datetime:
         now = timezone.now()
         today = now.date()
-        last_review_date = Review.get_last_review_date(reviewer=self.user)
         from_date = last_review_date or today
         next_review_datetime = self.get_next_review_datetime(
             from_date=from_date,
             include_from_date=last_review_date and last_review_date != today,
         )
-        ScheduleManager.add(reviewer=self.user, review_datetime=next_review_datetime)
+        # the review time of today may be over, the reviewer would be notified right away
+        if next_review_datetime <= now:
+            return self.review_calendar.next_review_datetime_after(now)
+        return next_review_datetime
+
+
+class PushSubscription(TimeStampedModel):
+    """Web push subscription of a browser of the user, see `leerming.core.webpush`."""
+
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="push_subscriptions"
+    )
+    endpoint = models.URLField(max_length=500, unique=True)
+    # keys of the browser, only needed to encrypt a payload
+    p256dh = models.CharField(max_length=100)
+    auth = models.CharField(max_length=50)
+
+    def __str__(self):
+        return f"{self.profile} - {self.endpoint[:50]}"
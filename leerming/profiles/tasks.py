@@ -1,8 +1,126 @@
+import datetime as dt
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.utils import timezone
+from django_q.tasks import async_task
+
 from .models import Profile
+from leerming.reviews.models import Review
+from leerming.reviews.models import ScheduleManager
+
+REGISTER_CHUNK_SIZE = 2000
+# seconds, below the timeout of the tasks
+REGISTER_TIME_BUDGET = 60
+
+DISPATCH_BATCH_SIZE = 1000
+# reviewers whose review time passed for longer than this, e.g. while the workers were down,
+# are not notified, their next review is still scheduled
+NOTIFICATION_DELAY_TOLERANCE = dt.timedelta(hours=1)
 
 
 def register_users_to_reviews():
-    """Make sure all users are registered to a review."""
+    """
+    Make sure all users are registered to a review. The profiles are handled in chunks, the next
+    review of a chunk is saved with one query. The last profile done is kept in the cache, when the
+    run takes longer than its time budget it stops and a new task resumes from there.
+    """
+    started_at = time.monotonic()
+    checkpoint_key = f"register_users_to_reviews_{timezone.now().date().isoformat()}"
+    last_pk = cache.get(checkpoint_key, 0)
+
+    while last_pk := _register_users_chunk(last_pk):
+        cache.set(checkpoint_key, last_pk, timeout=60 * 60 * 24)
+        if time.monotonic() - started_at > REGISTER_TIME_BUDGET:
+            async_task("leerming.profiles.tasks.register_users_to_reviews")
+            return
+    cache.delete(checkpoint_key)
+
+
+@transaction.atomic
+def _register_users_chunk(after_pk: int) -> int | None:
+    """
+    Register the chunk of profiles after `after_pk` without a next review, return the pk of the last
+    one or None when there is none left. The profiles with a next review are left to
+    `dispatch_due_reviews`, it moves their review forward once it is served, registering them again
+    could bring back a review already served. The profiles locked by a dispatch are skipped.
+    """
+    profiles = list(
+        Profile.objects.select_for_update(skip_locked=True)
+        .filter(pk__gt=after_pk, next_review_at__isnull=True)
+        .annotate(
+            last_review_date=Subquery(
+                Review.objects.filter(
+                    reviewer=OuterRef("user_id"), completed_at__isnull=False
+                )
+                .order_by("-creation_date")
+                .values("creation_date")[:1]
+            )
+        )
+        .order_by("pk")
+        .only("review_days", "review_time", "timezone", "next_review_at")[
+            :REGISTER_CHUNK_SIZE
+        ]
+    )
+    if not profiles:
+        return None
+
+    for profile in profiles:
+        profile.next_review_at = profile.get_next_review_datetime_after(
+            profile.last_review_date
+        )
+    Profile.objects.bulk_update(profiles, ["next_review_at"])
+    return profiles[-1].pk
+
+
+def dispatch_due_reviews():
+    """
+    Run every minute, notify the reviewers whose review time has come and schedule their next review.
+    The due profiles are handled in batches, each batch of reviewers gets a `ScheduleManager` that
+    sends the notifications in its own task.
+    """
+    now = timezone.now()
+    while _dispatch_due_reviews_batch(now):
+        pass
+
+
+@transaction.atomic
+def _dispatch_due_reviews_batch(now: dt.datetime) -> int:
+    # the profiles locked by a run still in progress are skipped
+    profiles = list(
+        Profile.objects.select_for_update(skip_locked=True)
+        .filter(next_review_at__lte=now)
+        .order_by("next_review_at")
+        .only("user_id", "review_days", "review_time", "timezone", "next_review_at")[
+            :DISPATCH_BATCH_SIZE
+        ]
+    )
+    if not profiles:
+        return 0
+
+    reviewer_ids = [
+        profile.user_id
+        for profile in profiles
+        if profile.next_review_at >= now - NOTIFICATION_DELAY_TOLERANCE
+    ]
+    for profile in profiles:
+        profile.next_review_at = profile.review_calendar.next_review_datetime_after(now)
+    Profile.objects.bulk_update(profiles, ["next_review_at"])
 
-    for profile in Profile.objects.all():
-        profile.register_for_next_review()
+    if reviewer_ids:
+        manager = ScheduleManager.objects.create()
+        manager.reviewers.through.objects.bulk_create(
+            manager.reviewers.through(schedulemanager=manager, user_id=reviewer_id)
+            for reviewer_id in reviewer_ids
+        )
+        transaction.on_commit(
+            lambda: async_task(
+                "leerming.reviews.tasks.run_schedule_manager",
+                manager_id=manager.id,
+                hook="leerming.reviews.tasks.update_manager_result_task",
+            )
+        )
+    return len(profiles)
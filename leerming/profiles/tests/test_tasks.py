@@ -0,0 +1,48 @@
+import datetime as dt
+
+import pytest
+from django.utils import timezone
+
+from leerming.profiles.models import Profile
+from leerming.profiles.tasks import dispatch_due_reviews
+from leerming.profiles.tasks import register_users_to_reviews
+from leerming.reviews.models import Review
+from leerming.reviews.models import ScheduleManager
+
+
+@pytest.fixture
+def served_profile(profile):
+    """Due a minute ago, the last review was completed yesterday so today's review is still to do."""
+    now = timezone.now()
+    Review.objects.create(
+        reviewer=profile.user,
+        creation_date=now.date() - dt.timedelta(days=1),
+        completed_at=now - dt.timedelta(days=1),
+    )
+    review_at = (now - dt.timedelta(minutes=1)).replace(second=0, microsecond=0)
+    Profile.objects.filter(pk=profile.pk).update(
+        review_time=review_at.time(), next_review_at=review_at
+    )
+    profile.refresh_from_db()
+    return profile
+
+
+def test_register_does_not_bring_back_a_served_review(served_profile):
+    dispatch_due_reviews()
+    register_users_to_reviews()
+    dispatch_due_reviews()
+
+    assert ScheduleManager.objects.filter(reviewers=served_profile.user).count() == 1
+    served_profile.refresh_from_db()
+    assert served_profile.next_review_at > timezone.now()
+
+
+def test_register_profiles_without_a_next_review(served_profile):
+    Profile.objects.filter(pk=served_profile.pk).update(next_review_at=None)
+
+    register_users_to_reviews()
+
+    served_profile.refresh_from_db()
+    assert served_profile.next_review_at > timezone.now()
+    dispatch_due_reviews()
+    assert not ScheduleManager.objects.exists()
@@ -7,4 +7,5 @@ app_name = "profiles"
 urlpatterns = [
     path("register/", views.register, name="register"),
     path("edit/", views.edit, name="edit"),
+    path("push-subscription/", views.push_subscription, name="push_subscription"),
 ]
@@ -1,11 +1,22 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import IntegrityError
 from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import HttpResponseBadRequest
 from django.shortcuts import redirect
 from django.template.response import TemplateResponse
+from django.views.decorators.http import require_http_methods
 
 from .decorators import profile_required
 from .forms import ProfileEditForm
 from .forms import ProfileForm
 from .models import Profile
+from .models import PushSubscription
+from leerming.core import webpush
 
 
 def register(request: HttpRequest):
@@ -23,4 +34,46 @@ def edit(request: HttpRequest):
     if request.method == "POST" and form.is_valid():
         form.save()
         return redirect("profiles:edit")
-    return TemplateResponse(request, "profiles/edit.html", {"form": form})
+    return TemplateResponse(
+        request,
+        "profiles/edit.html",
+        {"form": form, "vapid_public_key": settings.WEBPUSH_VAPID_PUBLIC_KEY},
+    )
+
+
+validate_endpoint = URLValidator(schemes=["https"])
+
+
+@profile_required
+@require_http_methods(["POST", "DELETE"])
+def push_subscription(request: HttpRequest):
+    """Save or remove the push subscription of the browser, sent as the JSON of the subscription."""
+    try:
+        subscription = json.loads(request.body)
+        endpoint = subscription["endpoint"]
+        validate_endpoint(endpoint)
+        if not webpush.is_push_service(endpoint):
+            raise ValidationError("unknown push service")
+    except (ValueError, KeyError, TypeError, ValidationError):
+        return HttpResponseBadRequest()
+
+    if request.method == "DELETE":
+        PushSubscription.objects.filter(
+            profile=request.user.profile, endpoint=endpoint
+        ).delete()
+        return HttpResponse(status=204)
+
+    keys = subscription.get("keys") or {}
+    try:
+        PushSubscription.objects.update_or_create(
+            profile=request.user.profile,
+            endpoint=endpoint,
+            defaults={
+                "p256dh": keys.get("p256dh", "")[:100],
+                "auth": keys.get("auth", "")[:50],
+            },
+        )
+    except IntegrityError:
+        # the endpoint is unique, it is the subscription of another profile
+        return HttpResponse(status=409)
+    return HttpResponse(status=201)
@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from .models import Notification
+from .models import NotificationSummary
 from .models import Review
 from .models import ScheduleManager
 
@@ -28,5 +30,34 @@ class ReviewAdmin(admin.ModelAdmin):
 
 @admin.register(ScheduleManager)
 class ScheduleManagerAdmin(admin.ModelAdmin):
-    list_display = ("id", "__str__", "schedule", "result_task", "created", "modified")
-    list_filter = ("created", "modified", "schedule", "result_task")
+    list_display = (
+        "id",
+        "__str__",
+        "result_task",
+        "nbr_of_sent",
+        "nbr_of_failed",
+        "created",
+        "modified",
+    )
+    list_filter = ("created", "modified", "result_task")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "manager",
+        "recipient",
+        "channel",
+        "status",
+        "attempts",
+        "scheduled_at",
+        "sent_at",
+    )
+    list_filter = ("channel", "status", "created")
+    raw_id_fields = ("manager", "recipient")
+
+
+@admin.register(NotificationSummary)
+class NotificationSummaryAdmin(admin.ModelAdmin):
+    list_display = ("date", "nbr_of_managers", "nbr_of_sent", "nbr_of_failed")
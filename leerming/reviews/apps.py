@@ -1,6 +1,30 @@
+from contextlib import suppress
+
 from django.apps import AppConfig
+from django.db import IntegrityError
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "leerming.reviews"
+
+    def ready(self):
+        from django_q.tasks import schedule
+        from django.utils import timezone
+
+        with suppress(IntegrityError):
+            schedule(
+                "leerming.reviews.tasks.deliver_due_notifications",
+                name="deliver_due_notifications",
+                schedule_type="I",
+                minutes=1,
+            )
+
+        with timezone.override("UTC"):
+            with suppress(IntegrityError):
+                schedule(
+                    "leerming.reviews.tasks.purge_notification_history",
+                    name="purge_notification_history",
+                    schedule_type="D",
+                    next_run=timezone.now().replace(hour=2, minute=0),
+                )
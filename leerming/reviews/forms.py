@@ -21,7 +21,7 @@ class ReviewForm(forms.Form):
         super().__init__(*args, **kwargs)
         self.fields["topics"].choices = [
             (NO_TOPIC_FLASHCARD, _("Cartes sans sujet"))
-        ] + [(topic.id, topic.title) for topic in self.request.user.topics.all()]
+        ] + list(Topic.get_titles(self.request.user.pk).items())
 
     def clean_topics(self) -> tuple[QuerySet[Topic], None | str]:
         cleaned_data = self.cleaned_data
@@ -72,3 +72,10 @@ class ReviewForm(forms.Form):
 
     def save(self) -> Review:
         return Review.get_or_create(**self.cleaned_data)
+
+
+class AnswerForm(forms.Form):
+    answer = forms.BooleanField(required=False)
+    # version of the session the card was shown on
+    version = forms.IntegerField(min_value=0)
+    key = forms.UUIDField()
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:49
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("flashcards", "0002_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("reviews", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewSession",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cursor", models.PositiveIntegerField(default=0)),
+                ("nbr_of_cards", models.PositiveIntegerField()),
+                (
+                    "review",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="session",
+                        to="reviews.review",
+                    ),
+                ),
+                (
+                    "reviewer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_session",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ReviewSessionCard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("question", models.CharField(max_length=250)),
+                ("answer", models.CharField(max_length=200)),
+                ("card_type", models.CharField(max_length=20)),
+                ("correct_answer", models.BooleanField(null=True)),
+                (
+                    "flashcard",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="review_session_cards",
+                        to="flashcards.flashcard",
+                    ),
+                ),
+                (
+                    "session",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cards",
+                        to="reviews.reviewsession",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="reviewsessioncard",
+            constraint=models.UniqueConstraint(
+                fields=("session", "position"), name="unique_review_session_position"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:53
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reviews", "0003_reviewsession"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["reviewer", "creation_date", "id"], name="review_history_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:55
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reviews", "0005_review_review_history_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reviewsession",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="reviewsessioncard",
+            name="answer_key",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
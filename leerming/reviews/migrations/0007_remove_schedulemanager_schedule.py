@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import OuterRef
+from django.db.models import Subquery
+
+
+def move_schedules_to_profiles(apps, schema_editor):
+    """The pending schedules become the `next_review_at` of the reviewers, the managers are
+    now created by `dispatch_due_reviews` when the reviews are due."""
+    Profile = apps.get_model("profiles", "Profile")
+    ScheduleManager = apps.get_model("reviews", "ScheduleManager")
+    Schedule = apps.get_model("django_q", "Schedule")
+    Profile.objects.update(
+        next_review_at=Subquery(
+            ScheduleManager.objects.filter(
+                reviewers=OuterRef("user_id"), schedule__isnull=False
+            )
+            .order_by("schedule__next_run")
+            .values("schedule__next_run")[:1]
+        )
+    )
+    ScheduleManager.objects.filter(result_task__isnull=True).delete()
+    Schedule.objects.filter(func="leerming.reviews.tasks.run_schedule_manager").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0017_task_cluster_alter"),
+        ("profiles", "0004_profile_next_review_at"),
+        ("reviews", "0006_reviewsession_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(move_schedules_to_profiles, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="schedulemanager",
+            name="schedule",
+        ),
+    ]
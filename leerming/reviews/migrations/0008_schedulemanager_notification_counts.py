@@ -0,0 +1,22 @@
+# Generated by Django 4.2.6 on 2026-10-18 10:59
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("reviews", "0007_remove_schedulemanager_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedulemanager",
+            name="nbr_of_failed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="schedulemanager",
+            name="nbr_of_sent",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db import models
+from django.db.models import F
+
+
+def schedule_pending_notifications(apps, schema_editor):
+    Notification = apps.get_model("reviews", "Notification")
+    Notification.objects.filter(status="PENDING").update(scheduled_at=F("created"))
+    # replaced by the deliver_due_notifications schedule
+    Schedule = apps.get_model("django_q", "Schedule")
+    Schedule.objects.filter(name="retry_failed_notifications").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0017_task_cluster_alter"),
+        ("reviews", "0009_notification"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notification_retry_idx",
+        ),
+        migrations.RenameField(
+            model_name="notification",
+            old_name="next_attempt_at",
+            new_name="scheduled_at",
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("scheduled_at__isnull", False)),
+                fields=["scheduled_at"],
+                name="notification_due_idx",
+            ),
+        ),
+        migrations.RunPython(schedule_pending_notifications, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.6 on 2026-10-18 11:07
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_q", "0017_task_cluster_alter"),
+        ("reviews", "0010_notification_scheduled_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                ("nbr_of_managers", models.PositiveIntegerField(default=0)),
+                ("nbr_of_sent", models.PositiveIntegerField(default=0)),
+                ("nbr_of_failed", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ("-date",),
+            },
+        ),
+        migrations.AlterField(
+            model_name="schedulemanager",
+            name="result_task",
+            field=models.OneToOneField(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="django_q.task",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="schedulemanager",
+            index=models.Index(fields=["created"], name="schedulemanager_created_idx"),
+        ),
+        # django-q does not index the columns the purge and the delivery groups look up
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS django_q_task_stopped_idx "
+            "ON django_q_task (stopped)",
+            "DROP INDEX IF EXISTS django_q_task_stopped_idx",
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS django_q_task_group_idx ON django_q_task ("group")',
+            "DROP INDEX IF EXISTS django_q_task_group_idx",
+        ),
+    ]
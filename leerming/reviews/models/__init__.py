@@ -2,19 +2,24 @@ from __future__ import annotations
 
 import datetime as dt
 import random
+import uuid
 from contextlib import suppress
-from dataclasses import asdict
-from dataclasses import dataclass
 
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections
 from django.db import models
 from django.db.models.query import QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from model_utils.models import TimeStampedModel
 
+from .outbox import Notification  # noqa
+from .schedule import NotificationSummary  # noqa
 from .schedule import ScheduleManager  # noqa
+from .session import ReviewSession
+from .session import ReviewSessionCard
+from leerming.flashcards.models import DUE_DATE
 from leerming.flashcards.models import FlashCard
 from leerming.flashcards.models import Topic
 from leerming.users.models import User
@@ -32,28 +37,35 @@ class SessionEndedError(ReviewError):
     pass
 
 
-@dataclass
-class SessionStore:
-    reviewer_email: str
-    current_review_id: int
-    flashcard_ids: list[int]
-    current_card_id: int
-    answers: dict[int, bool]
-
-    @staticmethod
-    def get_key(reviewer_email: str) -> str:
-        return f"review_for_{reviewer_email}"
-
-    @classmethod
-    def get(cls, reviewer_email: str) -> SessionStore | None:
-        if data := cache.get(cls.get_key(reviewer_email)):
-            return cls(**data)
+def _add_from_queryset(related_manager, queryset: QuerySet) -> None:
+    """Add the objects of the queryset to a many-to-many relation with a single INSERT ... SELECT,
+    the ids never go through python. Only meant for new instances, existing relations are not checked
+    and the m2m_changed signals are not sent."""
+    if queryset.query.is_empty():
+        return
+    through = related_manager.through
+    source_column = through._meta.get_field(related_manager.source_field_name).column
+    target_column = through._meta.get_field(related_manager.target_field_name).column
+    select_sql, params = (
+        queryset.values("pk").query.get_compiler(using=queryset.db).as_sql()
+    )
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        # only quoted table and column names are formatted in the query
+        cursor.execute(
+            f"INSERT INTO {quote_name(through._meta.db_table)} "  # noqa: S608
+            f"({quote_name(source_column)}, {quote_name(target_column)}) "
+            f"SELECT %s, selected.* FROM ({select_sql}) AS selected",
+            [related_manager.instance.pk, *params],
+        )
 
-    def save(self) -> None:
-        cache.set(self.get_key(self.reviewer_email), asdict(self), timeout=None)
 
-    def delete(self) -> None:
-        cache.delete(self.get_key(self.reviewer_email))
+class ReviewStatus(models.TextChoices):
+    FIRST_REVIEW = "FIRST_REVIEW"
+    NOT_STARTED = "NOT_STARTED"
+    IN_PROGRESS = "IN_PROGRESS"
+    COMPLETED_TODAY = "COMPLETED_TODAY"
 
 
 class Review(TimeStampedModel):
@@ -76,36 +88,39 @@ class Review(TimeStampedModel):
 
     class Meta:
         ordering = ("-creation_date",)
+        indexes = [
+            models.Index(
+                fields=["reviewer", "creation_date", "id"],
+                name="review_history_idx",
+            )
+        ]
 
     def __str__(self):
         return f"Revu du {self.creation_date} - score: {self.score_percentage}%"
 
     def start(self) -> None:
-        flashcards = list(self.flashcards.values_list("id", flat=True))
+        flashcards = list(
+            self.flashcards.values("id", "question", "answer", "card_type")
+        )
         random.shuffle(flashcards)
-        SessionStore(
-            reviewer_email=self.reviewer.email,
-            flashcard_ids=flashcards,
-            current_card_id=flashcards[0],
-            current_review_id=self.id,
-            answers={},
-        ).save()
+        ReviewSession.start(review=self, flashcards=flashcards)
+        self.clear_status(self.reviewer_id)
 
     def end(self) -> None:
-        session = SessionStore.get(self.reviewer.email)
-        answers = session.answers
+        answers = self.session.get_answers()
         completion_date = timezone.now()
 
-        nbr_of_correct_answers = 0
-        for flashcard_id, correct_answer in answers.items():
-            try:
-                self.flashcards.get(id=flashcard_id).review(
-                    correct_answer=correct_answer, for_date=completion_date.date()
-                )
-            except FlashCard.DoesNotExist:
-                continue
-            if correct_answer:
-                nbr_of_correct_answers += 1
+        # the flashcards may have been deleted since the start of the review
+        answered_flashcards = list(self.flashcards.filter(id__in=answers.keys()))
+        FlashCard.bulk_review(
+            answered_flashcards,
+            answers=answers,
+            for_date=completion_date.date(),
+            profile=self.reviewer.profile,
+        )
+        nbr_of_correct_answers = sum(
+            1 for flashcard in answered_flashcards if answers[flashcard.id]
+        )
 
         self.score_percentage = self.compute_score_percentage(
             score=nbr_of_correct_answers,
@@ -116,44 +131,45 @@ class Review(TimeStampedModel):
         self.save()
 
         # clean session
-        session.delete()
+        self.session.delete()
+        self.clear_status(self.reviewer_id)
 
         # create reminder for next review
         self.reviewer.profile.register_for_next_review()
 
-    def move_to_next_card(self) -> FlashCard:
-        session = SessionStore.get(self.reviewer.email)
-        try:
-            current_card_index = session.flashcard_ids.index(session.current_card_id)
-            next_flashcard_id = session.flashcard_ids[current_card_index + 1]
-        except IndexError as e:
-            raise SessionEndedError() from e
-
-        session.current_card_id = next_flashcard_id
-        session.save()
-
-        try:
-            return FlashCard.objects.get(pk=next_flashcard_id)
-        except FlashCard.DoesNotExist:
-            return self.move_to_next_card()
-
-    def add_answer(self, card_id: int, answer: bool) -> None:
-        session = SessionStore.get(self.reviewer.email)
-        session.answers[card_id] = answer
-        session.save()
-
-    def get_current_card(self) -> tuple[FlashCard, str]:
-        session = SessionStore.get(reviewer_email=self.reviewer.email)
-        current_card_index = session.flashcard_ids.index(session.current_card_id)
-        nbr_of_cards = len(session.flashcard_ids)
-        step = f"{current_card_index + 1}/{nbr_of_cards}"
-        return FlashCard.objects.get(pk=session.current_card_id), step
+    def move_to_next_card(self) -> ReviewSessionCard:
+        if next_card := self.session.move_to_next_card():
+            return next_card
+        raise SessionEndedError()
+
+    def answer_card(
+        self, answer: bool, version: int, key: uuid.UUID
+    ) -> ReviewSessionCard:
+        """
+        Answer the current card and return the next one. Submitting the same `key` again does not record
+        the answer twice, the current card is returned. Raise `SessionEndedError` after the last card and
+        `ReviewSession.VersionConflictError` when the card was answered on an outdated state of the session.
+        """
+        if self.session.is_answered(key):
+            return self.session.get_current_card()
+        if next_card := self.session.answer_current_card(
+            answer=answer, version=version, key=key
+        ):
+            return next_card
+        raise SessionEndedError()
+
+    def get_current_card(self) -> tuple[ReviewSessionCard, str]:
+        return self.session.get_current_card(), self.session.step
 
     @classmethod
     def get_current_review(cls, reviewer: User) -> Review | None:
-        session = SessionStore.get(reviewer_email=reviewer.email)
-        if session:
-            return cls.objects.filter(pk=session.current_review_id).first()
+        with suppress(ReviewSession.DoesNotExist):
+            # the session is cached on the review by the select_related
+            return (
+                ReviewSession.objects.select_related("review")
+                .get(reviewer=reviewer)
+                .review
+            )
 
     @classmethod
     def get_last_review_date(cls, reviewer: User) -> dt.date | None:
@@ -166,21 +182,16 @@ class Review(TimeStampedModel):
             )
 
     @classmethod
-    def get_review_start_message(
-        cls,
-        reviewer: User,
-        current_review: Review | None = None,
-    ) -> str | None:
+    def get_review_start_message(cls, reviewer: User) -> str | None:
         now = timezone.now()
         if not reviewer.profile.is_in_review_days(dt.date.today().weekday()):
             return
-        if reviewer.reviews.filter(
-            creation_date=now.date(), completed_at__isnull=False
-        ).exists():
+        status = cls.get_status(reviewer)
+        if status == ReviewStatus.COMPLETED_TODAY:
             return
-        if reviewer.reviews.count() == 0:
+        if status == ReviewStatus.FIRST_REVIEW:
             return _("Démarrez votre première révision!")
-        if current_review:
+        if status == ReviewStatus.IN_PROGRESS:
             return _("Continuez votre révision!")
         reviewer_time = reviewer.profile.review_time
         review_date = now.replace(hour=reviewer_time.hour, minute=reviewer_time.minute)
@@ -189,6 +200,35 @@ class Review(TimeStampedModel):
         if now > two_hours_before_review_time:
             return _("Démarrer votre révision d'aujourd'hui")
 
+    @staticmethod
+    def _get_status_cache_key(reviewer_id: int) -> str:
+        return f"review_status_{reviewer_id}_{timezone.now().date().isoformat()}"
+
+    @classmethod
+    def get_status(cls, reviewer: User) -> ReviewStatus:
+        """The status of today's review, cached until the end of the day or until it changes."""
+        key = cls._get_status_cache_key(reviewer.pk)
+        if status := cache.get(key):
+            return ReviewStatus(status)
+
+        today = timezone.now().date()
+        if reviewer.reviews.filter(
+            creation_date=today, completed_at__isnull=False
+        ).exists():
+            status = ReviewStatus.COMPLETED_TODAY
+        elif not reviewer.reviews.exists():
+            status = ReviewStatus.FIRST_REVIEW
+        elif ReviewSession.objects.filter(reviewer=reviewer).exists():
+            status = ReviewStatus.IN_PROGRESS
+        else:
+            status = ReviewStatus.NOT_STARTED
+        cache.set(key, status.value, timeout=60 * 60 * 24)
+        return status
+
+    @classmethod
+    def clear_status(cls, reviewer_id: int) -> None:
+        cache.delete(cls._get_status_cache_key(reviewer_id))
+
     @classmethod
     def compute_score_percentage(cls, score: int, nbr_of_cards: int) -> int:
         return 0 if nbr_of_cards == 0 else round((score / nbr_of_cards) * 100)
@@ -197,11 +237,43 @@ class Review(TimeStampedModel):
     def get_flashcards_to_review_for(
         cls, reviewer: User, date: dt.date
     ) -> QuerySet[FlashCard]:
-        return reviewer.flashcards.filter(
-            models.Q(next_review_date__lte=date)
-            | models.Q(next_review_date__isnull=True),
-            mastered_at__isnull=True,
+        return cls.filter_flashcards_to_review(reviewer.flashcards.all(), date=date)
+
+    @staticmethod
+    def filter_flashcards_to_review(
+        flashcards: QuerySet[FlashCard], date: dt.date
+    ) -> QuerySet[FlashCard]:
+        """
+        The flashcards not mastered and due on the date or never reviewed. The missing next review date
+        is coalesced to a date before any other instead of an `OR ... IS NULL`, so the lookup is a single
+        range of the `flashcard_due_idx` partial index.
+        """
+        return flashcards.alias(due_date=DUE_DATE).filter(
+            due_date__lte=date, mastered_at__isnull=True
+        )
+
+    @classmethod
+    def limit_flashcards_to_review(
+        cls, reviewer: User, flashcards: QuerySet[FlashCard]
+    ) -> QuerySet[FlashCard]:
+        """Keep the most overdue flashcards within the daily limit of the reviewer,
+        the others will be picked up by the next reviews. The cards never reviewed come
+        last, they only fill the places left by the overdue cards. Both are read in order
+        from their range of the `flashcard_due_idx` index, so only the kept cards are read.
+        """
+        max_cards = reviewer.profile.max_cards_per_review
+        if not max_cards:
+            return flashcards
+        due = (
+            flashcards.alias(due_date=DUE_DATE)
+            .order_by("due_date")
+            .values_list("pk", flat=True)
         )
+        # the missing next review dates are coalesced to the minimum date, see `DUE_DATE`
+        ids = list(due.filter(due_date__gt=dt.date.min)[:max_cards])
+        if len(ids) < max_cards:
+            ids += due.filter(due_date=dt.date.min)[: max_cards - len(ids)]
+        return flashcards.filter(pk__in=ids)
 
     @classmethod
     def get_or_create(
@@ -215,6 +287,10 @@ class Review(TimeStampedModel):
             return cls.objects.get(reviewer=reviewer, creation_date=creation_date)
 
         instance = cls.objects.create(reviewer=reviewer, creation_date=creation_date)
-        instance.flashcards.set(flashcards)
-        instance.topics.set(topics)
+        _add_from_queryset(
+            instance.flashcards,
+            cls.limit_flashcards_to_review(reviewer=reviewer, flashcards=flashcards),
+        )
+        if topics is not None:
+            _add_from_queryset(instance.topics, topics)
         return instance
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+
+from django.conf import settings
+from django.db import models
+from django.db import transaction
+from django.utils import timezone
+from model_utils.models import TimeStampedModel
+
+from ..utils import DeliveryReport
+from ..utils import send_email_notifications
+from ..utils import send_push_notifications
+from .schedule import ScheduleManager
+from leerming.users.models import User
+
+CLAIM_BATCH_SIZE = 100
+MAX_ATTEMPTS = 3
+# doubled after each failed attempt
+RETRY_DELAY = dt.timedelta(minutes=2)
+
+
+class Notification(TimeStampedModel):
+    """
+    Outbox of the notifications of a `ScheduleManager`, one row per reviewer and channel written when the
+    manager runs. The rows are claimed in batches with `SELECT ... FOR UPDATE SKIP LOCKED`, so several
+    workers can deliver the notifications of the same manager without sending one twice, and only the
+    failed ones are tried again.
+    """
+
+    class Channel(models.TextChoices):
+        EMAIL = "EMAIL"
+        PUSH = "PUSH"
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING"
+        SENT = "SENT"
+        FAILED = "FAILED"
+        # nowhere to send it to, e.g. all the push subscriptions expired
+        DISCARDED = "DISCARDED"
+
+    manager = models.ForeignKey(
+        ScheduleManager, on_delete=models.CASCADE, related_name="notifications"
+    )
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    channel = models.CharField(max_length=10, choices=Channel.choices)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # not sent before, unset once the notification is sent or given up
+    scheduled_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["manager", "recipient", "channel"], name="unique_notification"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["manager", "channel", "status"],
+                name="notification_delivery_idx",
+            ),
+            models.Index(
+                fields=["scheduled_at"],
+                condition=models.Q(scheduled_at__isnull=False),
+                name="notification_due_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.channel} to {self.recipient_id} - {self.status}"
+
+    @staticmethod
+    def get_delay(recipient_id: int) -> dt.timedelta:
+        """
+        Delay of the notifications of the recipient after the review time, spreads the notifications of a
+        manager over `NOTIFICATION_DISPATCH_WINDOW`. It only depends on the recipient, so they are notified
+        at the same time every day.
+        """
+        window = int(settings.NOTIFICATION_DISPATCH_WINDOW.total_seconds())
+        if not window:
+            return dt.timedelta()
+        digest = hashlib.sha256(str(recipient_id).encode()).digest()
+        return dt.timedelta(seconds=int.from_bytes(digest[:8], "big") % window)
+
+    @classmethod
+    def claimable(cls, now: dt.datetime) -> models.Q:
+        return models.Q(
+            status__in=[cls.Status.PENDING, cls.Status.FAILED], scheduled_at__lte=now
+        )
+
+    @classmethod
+    def deliver_batch(
+        cls, manager_id: int, channel: Channel, batch_size: int = CLAIM_BATCH_SIZE
+    ) -> int:
+        """Claim and send a batch of notifications, return the number of notifications claimed."""
+        now = timezone.now()
+        with transaction.atomic():
+            # the rows stay locked until they are marked, the other workers skip them
+            notifications = list(
+                cls.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("recipient__profile")
+                .filter(cls.claimable(now), manager_id=manager_id, channel=channel)
+                .order_by("scheduled_at")[:batch_size]
+            )
+            if not notifications:
+                return 0
+
+            recipients = [notification.recipient for notification in notifications]
+            if channel == cls.Channel.PUSH:
+                report = send_push_notifications(recipients)
+            else:
+                report = send_email_notifications(recipients)
+            nbr_of_sent, nbr_of_failed = cls._mark(notifications, report, now)
+            cls.objects.bulk_update(
+                notifications,
+                ["status", "attempts", "scheduled_at", "sent_at", "error"],
+            )
+            ScheduleManager(pk=manager_id).add_results(
+                nbr_of_sent=nbr_of_sent, nbr_of_failed=nbr_of_failed
+            )
+        return len(notifications)
+
+    @classmethod
+    def _mark(
+        cls, notifications: list[Notification], report: DeliveryReport, now: dt.datetime
+    ) -> tuple[int, int]:
+        """Set the outcome of the notifications, return the number of sent and of given up ones."""
+        nbr_of_sent = nbr_of_failed = 0
+        for notification in notifications:
+            notification.attempts += 1
+            notification.scheduled_at = None
+            if error := report.errors.get(notification.recipient_id):
+                notification.status = cls.Status.FAILED
+                notification.error = error
+                if notification.attempts < MAX_ATTEMPTS:
+                    notification.scheduled_at = now + RETRY_DELAY * 2 ** (
+                        notification.attempts - 1
+                    )
+                else:
+                    nbr_of_failed += 1
+            elif notification.recipient_id in report.discarded:
+                notification.status = cls.Status.DISCARDED
+            else:
+                notification.status = cls.Status.SENT
+                notification.sent_at = now
+                notification.error = ""
+                nbr_of_sent += 1
+        return nbr_of_sent, nbr_of_failed
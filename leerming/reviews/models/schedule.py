@@ -1,75 +1,117 @@
-import datetime as dt
-
 from django.db import models
 from django.utils import timezone
-from django_q.models import Schedule
 from model_utils.models import TimeStampedModel
 
-from ..utils import notify_reviewers
 from leerming.users.models import User
 
 
 class ScheduleManager(TimeStampedModel):
     """
     The aim of this model is to group users according to their review session schedule.
-      If some users have their next session on the same day, at the same time, they will be grouped so that notifications are sent
-     to them all at the same time, instead of one schedule per user.
-     This is mainly a way of getting around the fact that sendpulse campaigns are limited to one every 15 minutes.
+      The users whose review is due in the same minute are grouped by `dispatch_due_reviews` so that notifications
+     are sent to them all at the same time, in a single task, instead of one task per user.
     """
 
     reviewers = models.ManyToManyField(User)
-    schedule = models.OneToOneField(
-        "django_q.Schedule", on_delete=models.SET_NULL, null=True
-    )
+    # django-q prunes its tasks, the manager is kept until `purge_notification_history`
     result_task = models.OneToOneField(
-        "django_q.Task", on_delete=models.CASCADE, null=True
+        "django_q.Task", on_delete=models.SET_NULL, null=True
     )
+    # number of notifications, summed over the shards when the reviewers are split in several tasks
+    nbr_of_sent = models.PositiveIntegerField(default=0)
+    nbr_of_failed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [models.Index(fields=["created"], name="schedulemanager_created_idx")]
 
     def __str__(self) -> str:
-        if self.schedule:
-            return f"will run at {self.schedule.next_run}"
-        return f"ran at {self.result_task.started}"
-
-    @classmethod
-    def add(cls, reviewer: User, review_datetime: dt.datetime) -> None:
-        try:
-            manager = cls.objects.get(schedule__next_run=review_datetime)
-        except cls.DoesNotExist:
-            manager = cls.objects.create()
-            schedule = Schedule.objects.create(
-                func="leerming.reviews.tasks.run_schedule_manager",
-                next_run=review_datetime,
-                kwargs={"manager_id": manager.id},
-                hook="leerming.reviews.tasks.update_manager_result_task",
-            )
-            manager.schedule = schedule
-            manager.save()
-
-        manager.reviewers.add(reviewer)
-        manager.refresh_from_db()
-
-    @classmethod
-    def remove(cls, reviewer: User) -> None:
-        for manager in cls.objects.filter(reviewers__in=[reviewer]):
-            manager.reviewers.remove(reviewer)
-            if not manager.reviewers.exists():
-                if manager.schedule:
-                    manager.schedule.delete()
-                manager.delete()
-
-    def notify_reviewers(self):
-        from leerming.reviews.models import Review
+        if self.result_task:
+            return f"ran at {self.result_task.started}"
+        return f"created at {self.created}"
+
+    @property
+    def delivery_group(self) -> str:
+        return f"schedule_manager_{self.pk}"
 
-        date = timezone.now().date()
+    def add_results(self, nbr_of_sent: int, nbr_of_failed: int) -> None:
+        # several workers deliver the notifications, the counts are incremented in the database
+        ScheduleManager.objects.filter(pk=self.pk).update(
+            nbr_of_sent=models.F("nbr_of_sent") + nbr_of_sent,
+            nbr_of_failed=models.F("nbr_of_failed") + nbr_of_failed,
+        )
+
+    def plan_notifications(self) -> None:
+        """Write the notifications of the reviewers to the outbox in bulk, planning
+        the same manager again does not add the notifications twice."""
+        from leerming.core import webpush
+        from leerming.flashcards.models import FlashCard
+        from leerming.profiles.models import PushSubscription
+        from leerming.reviews.models import Notification
+        from leerming.reviews.models import Review
+        from leerming.reviews.models import ReviewSession
 
-        reviewers_to_notify = []
-        for reviewer in self.reviewers.select_related("profile").all():
-            last_review_was_today = (
-                Review.get_last_review_date(reviewer=reviewer) == date
+        today = timezone.now().date()
+        # the reviewers who did not complete today's review and have cards to review, computed in
+        # a single query
+        reviewers_to_notify = self.reviewers.filter(
+            models.Exists(
+                Review.filter_flashcards_to_review(
+                    FlashCard.objects.filter(owner=models.OuterRef("pk")), date=today
+                )
+            ),
+            ~models.Exists(
+                Review.objects.filter(
+                    reviewer=models.OuterRef("pk"),
+                    creation_date=today,
+                    completed_at__isnull=False,
+                )
+            ),
+            # no review in progress
+            ~models.Exists(
+                ReviewSession.objects.filter(reviewer=models.OuterRef("pk"))
+            ),
+        )
+        recipients_by_channel = {
+            Notification.Channel.EMAIL: reviewers_to_notify.filter(
+                profile__email_notifications_enabled=True
             )
-            on_going_review = bool(Review.get_current_review(reviewer=reviewer))
-            if last_review_was_today or on_going_review:
-                continue
-            reviewers_to_notify.append(reviewer)
+        }
+        if webpush.is_configured():
+            recipients_by_channel[
+                Notification.Channel.PUSH
+            ] = reviewers_to_notify.filter(
+                models.Exists(
+                    PushSubscription.objects.filter(profile__user=models.OuterRef("pk"))
+                )
+            )
+
+        now = timezone.now()
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    manager=self,
+                    recipient_id=recipient_id,
+                    channel=channel,
+                    scheduled_at=now + Notification.get_delay(recipient_id),
+                )
+                for channel, recipients in recipients_by_channel.items()
+                for recipient_id in recipients.values_list("id", flat=True)
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class NotificationSummary(models.Model):
+    """Daily counts of the schedule managers removed by `purge_notification_history`."""
 
-        notify_reviewers(reviewers_to_notify)
+    date = models.DateField(unique=True)
+    nbr_of_managers = models.PositiveIntegerField(default=0)
+    nbr_of_sent = models.PositiveIntegerField(default=0)
+    nbr_of_failed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("-date",)
+
+    def __str__(self) -> str:
+        return f"{self.date} - {self.nbr_of_sent} sent, {self.nbr_of_failed} failed"
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import uuid
+
+from django.db import models
+from django.db import transaction
+from django.db.models.query import QuerySet
+
+from leerming.flashcards.models import FlashCard
+from leerming.flashcards.models import FlashCardDisplayMixin
+
+
+class ReviewSession(models.Model):
+    """
+    State of the review in progress of a reviewer. The shuffled cards are written once when the review
+    starts, after that each step only moves the cursor or sets the answer of a single card, so the cost of
+    a step does not depend on the number of cards in the review.
+    The content of the cards is copied in the session, showing a card does not need to load the flashcard.
+    The reviewer can answer from several devices at once, every change of the cursor is a compare-and-set
+    on `version`, an answer given on an outdated state of the session is refused instead of overwriting
+    another one.
+    """
+
+    class VersionConflictError(Exception):
+        pass
+
+    cards: QuerySet[ReviewSessionCard]
+
+    reviewer = models.OneToOneField(
+        "users.User", on_delete=models.CASCADE, related_name="review_session"
+    )
+    review = models.OneToOneField(
+        "reviews.Review", on_delete=models.CASCADE, related_name="session"
+    )
+    # position of the current card
+    cursor = models.PositiveIntegerField(default=0)
+    nbr_of_cards = models.PositiveIntegerField()
+    # incremented each time the cursor moves
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.reviewer_id} - {self.step}"
+
+    @property
+    def step(self) -> str:
+        return f"{self.cursor + 1}/{self.nbr_of_cards}"
+
+    @classmethod
+    @transaction.atomic
+    def start(cls, review, flashcards: list[dict]) -> ReviewSession:
+        """`flashcards` are the values of the flashcards in the order of the review."""
+        cls.objects.filter(reviewer_id=review.reviewer_id).delete()
+        session = cls.objects.create(
+            reviewer_id=review.reviewer_id,
+            review=review,
+            nbr_of_cards=len(flashcards),
+        )
+        ReviewSessionCard.objects.bulk_create(
+            ReviewSessionCard(
+                session=session,
+                position=i,
+                flashcard_id=flashcard["id"],
+                question=flashcard["question"],
+                answer=flashcard["answer"],
+                card_type=flashcard["card_type"],
+            )
+            for i, flashcard in enumerate(flashcards)
+        )
+        return session
+
+    def get_current_card(self) -> ReviewSessionCard:
+        return self.cards.get(position=self.cursor)
+
+    def _get_next_card(self) -> ReviewSessionCard | None:
+        # cards deleted during the review are removed from the session by the cascade
+        return self.cards.filter(position__gt=self.cursor).order_by("position").first()
+
+    def _compare_and_set(self, version: int, cursor: int) -> bool:
+        """Move the cursor only if the session is still at `version`."""
+        updated = ReviewSession.objects.filter(pk=self.pk, version=version).update(
+            cursor=cursor, version=version + 1
+        )
+        if updated:
+            self.cursor = cursor
+            self.version = version + 1
+        return bool(updated)
+
+    def is_answered(self, key: uuid.UUID) -> bool:
+        return self.cards.filter(answer_key=key).exists()
+
+    @transaction.atomic
+    def answer_current_card(
+        self, answer: bool, version: int, key: uuid.UUID
+    ) -> ReviewSessionCard | None:
+        """
+        Record the answer to the current card and move to the next one, return None when there is
+        no card left. `version` is the version of the session the card was answered on, raise
+        `VersionConflictError` if the session changed since.
+        """
+        if version != self.version:
+            raise self.VersionConflictError()
+        answered_position = self.cursor
+        next_card = self._get_next_card()
+        # the cursor stays on the last card, the version still changes
+        cursor = next_card.position if next_card else answered_position
+        if not self._compare_and_set(version, cursor=cursor):
+            raise self.VersionConflictError()
+        self.cards.filter(position=answered_position).update(
+            correct_answer=answer, answer_key=key
+        )
+        return next_card
+
+    def move_to_next_card(self) -> ReviewSessionCard | None:
+        """Return None when there is no card left."""
+        next_card = self._get_next_card()
+        if next_card is None:
+            return None
+        # if it fails the cursor was already moved by another request
+        self._compare_and_set(self.version, cursor=next_card.position)
+        return next_card
+
+    def get_answers(self) -> dict[int, bool]:
+        return dict(
+            self.cards.filter(correct_answer__isnull=False).values_list(
+                "flashcard_id", "correct_answer"
+            )
+        )
+
+
+class ReviewSessionCard(FlashCardDisplayMixin, models.Model):
+    session = models.ForeignKey(
+        ReviewSession, on_delete=models.CASCADE, related_name="cards"
+    )
+    flashcard = models.ForeignKey(
+        FlashCard, on_delete=models.CASCADE, related_name="review_session_cards"
+    )
+    position = models.PositiveIntegerField()
+    question = models.CharField(max_length=250)
+    answer = models.CharField(max_length=200)
+    card_type = models.CharField(max_length=20)
+    # answer given by the reviewer
+    correct_answer = models.BooleanField(null=True)
+    # idempotency key of the answer, a retried submission is only recorded once
+    answer_key = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "position"], name="unique_review_session_position"
+            )
+        ]
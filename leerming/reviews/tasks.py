@@ -1,6 +1,86 @@
+import datetime as dt
+import math
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Q
+from django.utils import timezone
+from django_q.models import OrmQ
 from django_q.models import Task
+from django_q.tasks import async_task
 
+from .models import Notification
+from .models import NotificationSummary
 from .models import ScheduleManager
+from .models.outbox import CLAIM_BATCH_SIZE
+from leerming.core.ratelimit import TokenBucket
+from leerming.profiles.tasks import DISPATCH_BATCH_SIZE
+
+DELIVER_NOTIFICATIONS = "leerming.reviews.tasks.deliver_notifications"
+# seconds, below the timeout of the tasks
+DELIVERY_TIME_BUDGET = 60
+HISTORY_RETENTION = dt.timedelta(days=30)
+# each manager can have thousands of notifications, removed with it
+PURGE_MANAGERS_BATCH_SIZE = 50
+PURGE_TASKS_BATCH_SIZE = 1000
+# seconds, below the timeout of the tasks
+PURGE_TIME_BUDGET = 60
+
+
+def _get_max_delivery_tasks() -> int:
+    # at most one delivery task per worker of the cluster
+    return settings.Q_CLUSTER["workers"]
+
+
+def _get_delivery_shard_size() -> int:
+    """Number of due notifications above which the delivery is split between several parallel tasks,
+    the notifications of a full dispatch batch are shared between all the workers."""
+    return math.ceil(DISPATCH_BATCH_SIZE / _get_max_delivery_tasks())
+
+
+def _get_busy_deliveries() -> set[tuple[int, str]]:
+    """(manager id, channel) of the delivery tasks queued or running, the ORM broker only removes
+    a task from the queue once it is done."""
+    return {
+        (queued.kwargs()["manager_id"], str(queued.kwargs()["channel"]))
+        for queued in OrmQ.objects.all()
+        if queued.func() == DELIVER_NOTIFICATIONS
+    }
+
+
+def _enqueue_deliveries(manager_id: int, channel: str, nbr_of_tasks: int):
+    for _ in range(nbr_of_tasks):
+        async_task(
+            DELIVER_NOTIFICATIONS,
+            manager_id=manager_id,
+            channel=channel,
+            group=ScheduleManager(pk=manager_id).delivery_group,
+        )
+
+
+def _enqueue_due_deliveries(notifications):
+    due = (
+        notifications.filter(Notification.claimable(timezone.now()))
+        .values("manager_id", "channel")
+        .annotate(count=Count("pk"))
+        .values_list("manager_id", "channel", "count")
+    )
+    shard_size = _get_delivery_shard_size()
+    busy = _get_busy_deliveries()
+    for manager_id, channel, nbr_of_due in due:
+        # the tasks already on the outbox take the new due notifications as well
+        if (manager_id, channel) in busy:
+            continue
+        # the workers drain the outbox of the manager in parallel
+        _enqueue_deliveries(
+            manager_id,
+            channel,
+            min(math.ceil(nbr_of_due / shard_size), _get_max_delivery_tasks()),
+        )
 
 
 def run_schedule_manager(manager_id: int):
@@ -9,13 +89,119 @@ def run_schedule_manager(manager_id: int):
     except ScheduleManager.DoesNotExist:
         return
 
-    manager.notify_reviewers()
+    manager.plan_notifications()
+    # the notifications delayed in the dispatch window are sent by `deliver_due_notifications`
+    _enqueue_due_deliveries(manager.notifications.all())
+
+
+def deliver_due_notifications():
+    """Run every minute, deliver the notifications whose time has come, the ones spread
+    in the dispatch window of their manager and the failed ones to try again."""
+    _enqueue_due_deliveries(Notification.objects.all())
+
+
+def deliver_notifications(manager_id: int, channel: str):
+    """Deliver the due notifications of the manager until there is none left to claim, a new task
+    takes over when the time budget is exceeded. The emails are sent at most at the rate of the
+    provider, shared between the workers."""
+    started_at = time.monotonic()
+    batch_size = CLAIM_BATCH_SIZE
+    bucket = None
+    if channel == Notification.Channel.EMAIL:
+        # full provider batches, each one waits for its tokens, the bucket starts empty so the
+        # tasks of the workers do not all send a batch at once when they start
+        batch_size = settings.REVIEW_NOTIFICATION_BATCH_SIZE
+        bucket = TokenBucket(
+            rate=settings.NOTIFICATION_EMAIL_RATE / _get_max_delivery_tasks(),
+            capacity=batch_size,
+            tokens=0,
+        )
+
+    nbr_of_claimed = 0
+    while True:
+        if bucket:
+            bucket.wait(batch_size)
+        claimed = Notification.deliver_batch(
+            manager_id, channel=channel, batch_size=batch_size
+        )
+        if not claimed:
+            break
+        if bucket:
+            bucket.take(claimed)
+        nbr_of_claimed += claimed
+        if time.monotonic() - started_at > DELIVERY_TIME_BUDGET:
+            _enqueue_deliveries(manager_id, channel, nbr_of_tasks=1)
+            break
+    return nbr_of_claimed
 
 
 def update_manager_result_task(task: Task):
-    try:
-        manager = ScheduleManager.objects.get(pk=task.kwargs["manager_id"])
-    except ScheduleManager.DoesNotExist:
-        return
-    manager.result_task = task
-    manager.save()
+    # an update of the single column, the delivery tasks may be incrementing the counts
+    ScheduleManager.objects.filter(pk=task.kwargs["manager_id"]).update(
+        result_task=task
+    )
+
+
+@transaction.atomic
+def _purge_managers_batch(before: dt.datetime) -> int:
+    managers = list(
+        ScheduleManager.objects.filter(created__lt=before)
+        .order_by("created")
+        .values("id", "created", "nbr_of_sent", "nbr_of_failed", "result_task_id")[
+            :PURGE_MANAGERS_BATCH_SIZE
+        ]
+    )
+    if not managers:
+        return 0
+
+    counts_by_date = defaultdict(lambda: {"managers": 0, "sent": 0, "failed": 0})
+    for manager in managers:
+        counts = counts_by_date[manager["created"].date()]
+        counts["managers"] += 1
+        counts["sent"] += manager["nbr_of_sent"]
+        counts["failed"] += manager["nbr_of_failed"]
+    for date, counts in counts_by_date.items():
+        NotificationSummary.objects.get_or_create(date=date)
+        NotificationSummary.objects.filter(date=date).update(
+            nbr_of_managers=F("nbr_of_managers") + counts["managers"],
+            nbr_of_sent=F("nbr_of_sent") + counts["sent"],
+            nbr_of_failed=F("nbr_of_failed") + counts["failed"],
+        )
+
+    manager_ids = [manager["id"] for manager in managers]
+    Task.objects.filter(
+        Q(id__in=[manager["result_task_id"] for manager in managers])
+        | Q(group__in=[ScheduleManager(pk=pk).delivery_group for pk in manager_ids])
+    ).delete()
+    # the notifications and reviewers of the managers are removed by the cascade
+    ScheduleManager.objects.filter(id__in=manager_ids).delete()
+    return len(managers)
+
+
+def purge_notification_history():
+    """
+    Run daily, remove the schedule managers and the django-q tasks older than `HISTORY_RETENTION`
+    in small batches, the counts of the managers are added to the `NotificationSummary` of their
+    day. A new task takes over when the time budget is exceeded.
+    """
+    started_at = time.monotonic()
+    before = timezone.now() - HISTORY_RETENTION
+
+    def is_over_budget() -> bool:
+        return time.monotonic() - started_at > PURGE_TIME_BUDGET
+
+    while _purge_managers_batch(before):
+        if is_over_budget():
+            async_task("leerming.reviews.tasks.purge_notification_history")
+            return
+
+    # the tasks of the other functions, django-q only prunes the successful ones
+    while task_ids := list(
+        Task.objects.filter(stopped__lt=before).values_list("id", flat=True)[
+            :PURGE_TASKS_BATCH_SIZE
+        ]
+    ):
+        Task.objects.filter(id__in=task_ids).delete()
+        if is_over_budget():
+            async_task("leerming.reviews.tasks.purge_notification_history")
+            return
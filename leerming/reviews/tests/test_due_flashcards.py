@@ -0,0 +1,87 @@
+import datetime as dt
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from leerming.flashcards.models import FlashCard
+from leerming.reviews.models import Review
+
+
+@pytest.fixture
+def flashcards(user):
+    today = timezone.now().date()
+    next_review_dates = [None, today - dt.timedelta(days=2), today, None] + [
+        today + dt.timedelta(days=i) for i in range(1, 50)
+    ]
+    flashcards = FlashCard.objects.bulk_create(
+        FlashCard(
+            owner=user,
+            question=f"question {i}",
+            answer=f"answer {i}",
+            next_review_date=next_review_date,
+        )
+        for i, next_review_date in enumerate(next_review_dates)
+    )
+    FlashCard.objects.filter(pk=flashcards[3].pk).update(mastered_at=timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE flashcards_flashcard")
+    return flashcards
+
+
+def _explain(sql: str, params=()) -> str:
+    with connection.cursor() as cursor:
+        # the tables of the tests are tiny, the planner would rather scan them
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def test_flashcards_to_review(user, flashcards):
+    queryset = Review.get_flashcards_to_review_for(
+        reviewer=user, date=timezone.now().date()
+    )
+
+    assert set(queryset) == set(flashcards[:3])
+
+
+def test_flashcards_to_review_use_the_due_index(user, flashcards):
+    queryset = Review.get_flashcards_to_review_for(
+        reviewer=user, date=timezone.now().date()
+    )
+
+    assert "flashcard_due_idx" in _explain(*queryset.query.sql_with_params())
+
+
+def _limit_flashcards_to_review(profile, max_cards: int):
+    profile.max_cards_per_review = max_cards
+    return Review.limit_flashcards_to_review(
+        reviewer=profile.user,
+        flashcards=Review.get_flashcards_to_review_for(
+            reviewer=profile.user, date=timezone.now().date()
+        ),
+    )
+
+
+def test_limited_flashcards_to_review_are_the_most_overdue(profile, flashcards):
+    queryset = _limit_flashcards_to_review(profile, max_cards=2)
+
+    assert set(queryset) == {flashcards[1], flashcards[2]}
+
+
+def test_never_reviewed_flashcards_fill_the_limit(profile, flashcards):
+    queryset = _limit_flashcards_to_review(profile, max_cards=5)
+
+    assert set(queryset) == set(flashcards[:3])
+
+
+def test_limited_flashcards_to_review_are_not_sorted(profile, flashcards):
+    with CaptureQueriesContext(connection) as context:
+        _limit_flashcards_to_review(profile, max_cards=5)
+
+    assert len(context.captured_queries) == 2
+    for query in context.captured_queries:
+        plan = _explain(query["sql"])
+        assert "flashcard_due_idx" in plan
+        assert "Sort" not in plan
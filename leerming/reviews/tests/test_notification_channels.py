@@ -0,0 +1,65 @@
+import datetime as dt
+
+import pytest
+from django.core import mail
+
+from leerming.profiles.models import Profile
+from leerming.profiles.models import PushSubscription
+from leerming.reviews.utils import batch_email_channel
+from leerming.reviews.utils import send_push_notifications
+from leerming.users.models import User
+
+
+@pytest.fixture
+def recipients(db) -> list[User]:
+    users = []
+    for i in range(5):
+        user = User.objects.create_user(email=f"user{i}@leerming.com")
+        Profile.objects.create(
+            user=user, short_name=f"user {i}", review_days=[0], review_time=dt.time(18)
+        )
+        users.append(user)
+    return users
+
+
+def test_batch_email_channel_sends_a_message_per_chunk(settings, recipients):
+    settings.EMAIL_BACKEND = "anymail.backends.test.EmailBackend"
+    settings.REVIEW_NOTIFICATION_BATCH_SIZE = 2
+
+    report = batch_email_channel(recipients, template_id="review-notification")
+
+    assert not report.errors
+    assert len(mail.outbox) == 3
+    chunks = [recipients[0:2], recipients[2:4], recipients[4:]]
+    for message, chunk in zip(mail.outbox, chunks, strict=True):
+        params = message.anymail_test_params
+        assert params["is_batch_send"]
+        assert params["template_id"] == "review-notification"
+        assert [email.addr_spec for email in params["to"]] == [
+            user.email for user in chunk
+        ]
+        assert params["merge_data"] == {
+            user.email: {"name": user.profile.short_name} for user in chunk
+        }
+
+
+def test_push_notifications_remove_the_expired_subscriptions(settings, recipients):
+    settings.WEBPUSH_STUB = True
+    endpoint = "https://fcm.googleapis.com/fcm/send/{}"
+    # the second recipient only has an expired subscription, the third has none
+    for user, path in [
+        (recipients[0], "0"),
+        (recipients[0], "expired"),
+        (recipients[1], "1/expired"),
+    ]:
+        PushSubscription.objects.create(
+            profile=user.profile, endpoint=endpoint.format(path), p256dh="", auth=""
+        )
+
+    report = send_push_notifications(recipients[:3])
+
+    assert not report.errors
+    assert report.discarded == {recipients[1].id, recipients[2].id}
+    assert list(PushSubscription.objects.values_list("endpoint", flat=True)) == [
+        endpoint.format("0")
+    ]
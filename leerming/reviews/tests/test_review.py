@@ -0,0 +1,23 @@
+from django.utils import timezone
+
+from leerming.flashcards.models import FlashCard
+from leerming.flashcards.models import Topic
+from leerming.reviews.models import Review
+
+
+def test_get_or_create_adds_the_flashcards_and_topics(user, profile):
+    topic = Topic.objects.create(created_by=user, title="topic")
+    flashcards = FlashCard.objects.bulk_create(
+        FlashCard(owner=user, question=f"question {i}", answer=f"answer {i}")
+        for i in range(3)
+    )
+
+    review = Review.get_or_create(
+        reviewer=user,
+        creation_date=timezone.now().date(),
+        flashcards=user.flashcards.all(),
+        topics=user.topics.all(),
+    )
+
+    assert set(review.flashcards.all()) == set(flashcards)
+    assert list(review.topics.all()) == [topic]
@@ -0,0 +1,109 @@
+import datetime as dt
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+from django_q.models import OrmQ
+
+from leerming.core import ratelimit
+from leerming.profiles.models import Profile
+from leerming.reviews.models import Notification
+from leerming.reviews.models import outbox
+from leerming.reviews.models import ScheduleManager
+from leerming.reviews.tasks import deliver_due_notifications
+from leerming.reviews.tasks import deliver_notifications
+from leerming.reviews.tasks import run_schedule_manager
+from leerming.users.models import User
+
+
+def _queued_deliveries() -> list[dict]:
+    return [
+        queued.kwargs()
+        for queued in OrmQ.objects.all()
+        if queued.func() == "leerming.reviews.tasks.deliver_notifications"
+    ]
+
+
+@pytest.fixture
+def manager(db) -> ScheduleManager:
+    """A manager with 300 emails due, more than the share of a worker of a dispatch batch."""
+    manager = ScheduleManager.objects.create()
+    recipients = User.objects.bulk_create(
+        User(email=f"user{i}@leerming.com") for i in range(300)
+    )
+    Profile.objects.bulk_create(
+        Profile(user=user, review_days=[0], review_time=dt.time(18))
+        for user in recipients
+    )
+    Notification.objects.bulk_create(
+        Notification(
+            manager=manager,
+            recipient=recipient,
+            channel=Notification.Channel.EMAIL,
+            scheduled_at=timezone.now(),
+        )
+        for recipient in recipients
+    )
+    return manager
+
+
+def test_a_manager_fans_out_to_several_delivery_tasks(settings, manager):
+    settings.Q_CLUSTER = {**settings.Q_CLUSTER, "workers": 4}
+
+    run_schedule_manager(manager.id)
+
+    # 250 notifications per task for a dispatch batch of 1000
+    assert (
+        _queued_deliveries()
+        == [{"manager_id": manager.id, "channel": Notification.Channel.EMAIL}] * 2
+    )
+
+
+def test_the_due_deliveries_are_not_enqueued_twice(settings, manager):
+    settings.Q_CLUSTER = {**settings.Q_CLUSTER, "workers": 4}
+
+    deliver_due_notifications()
+    deliver_due_notifications()
+
+    assert len(_queued_deliveries()) == 2
+
+
+class _Clock:
+    """Stand-in for the `time` module of the token bucket, sleeping only moves the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_the_emails_are_sent_at_the_rate_of_the_provider(
+    settings, monkeypatch, manager
+):
+    settings.Q_CLUSTER = {**settings.Q_CLUSTER, "workers": 2}
+    settings.NOTIFICATION_EMAIL_RATE = 20
+    settings.REVIEW_NOTIFICATION_BATCH_SIZE = 50
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    sent_at = []
+    send_email_notifications = outbox.send_email_notifications
+
+    def send(recipients):
+        sent_at.append((clock.now, len(recipients)))
+        return send_email_notifications(recipients)
+
+    monkeypatch.setattr(outbox, "send_email_notifications", send)
+
+    deliver_notifications(manager.id, channel=Notification.Channel.EMAIL)
+
+    assert len(mail.outbox) == 300
+    # the share of the task of the rate, 10 emails per second, from the first email on
+    nbr_of_sent = 0
+    for at, nbr_of_recipients in sent_at:
+        nbr_of_sent += nbr_of_recipients
+        assert nbr_of_sent <= at * 10
+    assert sent_at[-1][0] == pytest.approx(30)
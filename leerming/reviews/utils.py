@@ -1,43 +1,135 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from dataclasses import field
+from itertools import islice
+
+from anymail.message import AnymailMessage
 from django.conf import settings
 from django.core.mail import EmailMultiAlternatives
 from django.core.mail import get_connection
 from django.template.loader import render_to_string
+from django.utils.html import escape
 from html2text import html2text
 
+from leerming.core import webpush
 from leerming.users.models import User
 
+# rendered in place of the name of the recipient, then replaced for each recipient
+NAME_PLACEHOLDER = "LEERMINGRECIPIENTNAME"
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@dataclass
+class DeliveryReport:
+    # error of each recipient the notification could not be sent to
+    errors: dict[int, str] = field(default_factory=dict)
+    # recipients without anywhere to send the notification to
+    discarded: set[int] = field(default_factory=set)
+
 
-def email_channel(recipients: list[User], template_name: str, subject: str):
-    connection = get_connection()
+def _get_name(user: User) -> str:
+    return user.profile.short_name or user.profile.full_name
+
+
+def email_channel(
+    recipients: list[User], template_name: str, subject: str
+) -> DeliveryReport:
+    """
+    The template is rendered and converted to text once, only the name is set for each recipient.
+    The emails are sent one by one over a single connection, a failure does not stop the next ones.
+    """
+    report = DeliveryReport()
     from_email = settings.DEFAULT_FROM_EMAIL
-    # construct emails for each reviewer
-    messages = []
-    for user in recipients:
-        rendered_html_body = render_to_string(
-            template_name, {"name": user.profile.short_name or user.profile.full_name}
-        )
-        message = EmailMultiAlternatives(
-            subject,
-            body=html2text(rendered_html_body),
-            from_email=from_email,
-            to=[user.email],
-        )
-        message.attach_alternative(rendered_html_body, "text/html")
-        messages.append(message)
-
-    connection.send_messages(messages)
-
-
-def notify_reviewers(reviewers: list[User]):
-    # group reviewers by channels that are available to them
-    # send notifications via each channel
-    email_users = [
-        reviewer
-        for reviewer in reviewers
-        if reviewer.profile.email_notifications_enabled
-    ]
-    email_channel(
-        email_users,
+    html_body = render_to_string(template_name, {"name": NAME_PLACEHOLDER})
+    text_body = html2text(html_body)
+
+    with get_connection() as connection:
+        for user in recipients:
+            name = _get_name(user)
+            message = EmailMultiAlternatives(
+                subject,
+                body=text_body.replace(NAME_PLACEHOLDER, name),
+                from_email=from_email,
+                to=[user.email],
+            )
+            message.attach_alternative(
+                html_body.replace(NAME_PLACEHOLDER, escape(name)), "text/html"
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                report.errors[user.id] = str(e)
+    return report
+
+
+def batch_email_channel(recipients: list[User], template_id: str) -> DeliveryReport:
+    """
+    Send a template stored by the email provider with the name of each recipient as merge data,
+    anymail sends it as a batch, a single call to the provider for each chunk of recipients.
+    """
+    report = DeliveryReport()
+    with get_connection() as connection:
+        for chunk in chunked(recipients, settings.REVIEW_NOTIFICATION_BATCH_SIZE):
+            message = AnymailMessage(
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[user.email for user in chunk],
+            )
+            message.template_id = template_id
+            message.merge_data = {
+                user.email: {"name": _get_name(user)} for user in chunk
+            }
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                report.errors.update({user.id: str(e) for user in chunk})
+                continue
+            statuses = message.anymail_status.recipients
+            for user in chunk:
+                status = statuses.get(user.email)
+                if status and status.status in ("failed", "invalid", "rejected"):
+                    report.errors[user.id] = status.status
+    return report
+
+
+def send_email_notifications(recipients: list[User]) -> DeliveryReport:
+    if template_id := settings.REVIEW_NOTIFICATION_TEMPLATE_ID:
+        return batch_email_channel(recipients, template_id=template_id)
+    return email_channel(
+        recipients,
         template_name="emails/review_notification.html",
         subject="Notifications de Leerming",
     )
+
+
+def send_push_notifications(recipients: list[User]) -> DeliveryReport:
+    """Push to every browser subscribed by the recipients, the expired subscriptions are removed."""
+    from leerming.profiles.models import PushSubscription
+
+    report = DeliveryReport()
+    subscriptions = list(
+        PushSubscription.objects.filter(
+            profile__user__in=[user.id for user in recipients]
+        ).values_list("id", "endpoint", "profile__user_id")
+    )
+    user_by_subscription = {
+        subscription_id: user_id for subscription_id, _, user_id in subscriptions
+    }
+    result = webpush.send_pushes(
+        [(subscription_id, endpoint) for subscription_id, endpoint, _ in subscriptions]
+    )
+    PushSubscription.objects.filter(id__in=result.expired).delete()
+
+    reached = {user_by_subscription[i] for i in result.sent}
+    failed = {user_by_subscription[i] for i in result.failed} - reached
+    for user in recipients:
+        if user.id in failed:
+            report.errors[user.id] = "push failed"
+        elif user.id not in reached:
+            report.discarded.add(user.id)
+    return report
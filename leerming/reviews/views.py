@@ -1,4 +1,10 @@
-from django import forms
+import uuid
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import Count
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.http import HttpRequest
 from django.shortcuts import get_object_or_404
@@ -10,12 +16,19 @@ from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_http_methods
 from django_htmx.http import HttpResponseClientRedirect
 
+from .forms import AnswerForm
 from .forms import ReviewForm
 from .models import Review
+from .models import ReviewSession
+from .models import ReviewSessionCard
+from .models import ReviewStatus
 from .models import SessionEndedError
-from leerming.flashcards.models import FlashCard
+from leerming.core.pagination import paginate_by_keyset
+from leerming.flashcards.models import Topic
 from leerming.users.models import User
 
+REVIEWS_PER_PAGE = 20
+
 
 def _get_current_review_or_404(user: User) -> Review:
     if current_review := Review.get_current_review(reviewer=user):
@@ -24,14 +37,38 @@ def _get_current_review_or_404(user: User) -> Review:
 
 
 def index(request: HttpRequest):
+    reviews = request.user.reviews.annotate(
+        flashcards_count=Coalesce(
+            Subquery(
+                Review.flashcards.through.objects.filter(review=OuterRef("pk"))
+                .order_by()
+                .values("review")
+                .annotate(count=Count("pk"))
+                .values("count")
+            ),
+            0,
+        ),
+        topic_titles=ArraySubquery(
+            Topic.objects.filter(review=OuterRef("pk"))
+            .order_by("title")
+            .values("title")
+        ),
+    )
+    page = paginate_by_keyset(
+        reviews,
+        ordering=("-creation_date", "-id"),
+        per_page=REVIEWS_PER_PAGE,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
     return TemplateResponse(
         request,
         "reviews/index.html",
         {
-            "reviews": request.user.reviews.prefetch_related("topics"),
+            "page": page,
+            "total_count": request.user.reviews.count(),
             "start_review_message": Review.get_review_start_message(
-                reviewer=request.user,
-                current_review=Review.get_current_review(reviewer=request.user),
+                reviewer=request.user
             ),
         },
     )
@@ -43,6 +80,9 @@ def details(request: HttpRequest, review_id: int):
 
 
 def no_cards_to_review(request: HttpRequest):
+    today = timezone.now().date()
+    if Review.get_flashcards_to_review_for(reviewer=request.user, date=today).exists():
+        return redirect("reviews:start")
     return TemplateResponse(
         request,
         "reviews/no_cards_to_review.html",
@@ -78,35 +118,71 @@ def show_current_card(request: HttpRequest):
     current_review = _get_current_review_or_404(request.user)
     try:
         current_card, step = current_review.get_current_card()
-    except FlashCard.DoesNotExist:
+    except ReviewSessionCard.DoesNotExist:
+        # the card was deleted since the start of the review
         return redirect("reviews:move_to_next_card")
 
     return TemplateResponse(
-        request, "reviews/show_current_card.html", {"card": current_card, "step": step}
+        request,
+        "reviews/show_current_card.html",
+        {"card": current_card, "step": step, "version": current_review.session.version},
     )
 
 
 def reveal_answer(request: HttpRequest):
     current_review = _get_current_review_or_404(request.user)
+    version = request.GET.get("version")
+    if version != str(current_review.session.version):
+        # the review moved on from another device since the card was shown
+        return HttpResponseClientRedirect(reverse("reviews:show_current_card"))
     current_card, _ = current_review.get_current_card()
     return TemplateResponse(
         request,
         "reviews/show_current_card.html#answer_revealed",
-        {"flashcard": current_card},
+        {"flashcard": current_card, "version": version, "answer_key": uuid.uuid4()},
     )
 
 
-answer_field = forms.BooleanField(required=False)
+def _render_card(
+    request: HttpRequest, card: ReviewSessionCard, session: ReviewSession
+) -> TemplateResponse:
+    return TemplateResponse(
+        request,
+        "reviews/show_current_card.html#card",
+        {"card": card, "step": session.step, "version": session.version},
+    )
 
 
 @require_http_methods(["POST"])
 def answer_card(request: HttpRequest):
-    current_review = _get_current_review_or_404(request.user)
-    current_card, _ = current_review.get_current_card()
-    current_review.add_answer(
-        card_id=current_card.id, answer=answer_field.clean(request.POST.get("answer"))
-    )
-    return redirect("reviews:move_to_next_card")
+    """Record the answer to the current card and respond with the next card, or with the end
+    of the review when it was the last one, in a single round trip.
+    The answer is only recorded if the review is still on the card it was answered on, otherwise
+    the current card is shown again. A retried submission is not recorded twice."""
+    current_review = Review.get_current_review(reviewer=request.user)
+    if current_review is None:
+        if Review.get_status(request.user) == ReviewStatus.COMPLETED_TODAY:
+            # the answer to the last card was retried after the end of the review
+            return TemplateResponse(request, "reviews/end.html#content")
+        raise Http404(_("No review in progress"))
+
+    session = current_review.session
+    form = AnswerForm(request.POST)
+    try:
+        if not form.is_valid():
+            raise ReviewSession.VersionConflictError()
+        next_card = current_review.answer_card(**form.cleaned_data)
+    except ReviewSession.VersionConflictError:
+        # show the card the review is really on
+        session.refresh_from_db()
+        try:
+            return _render_card(request, session.get_current_card(), session)
+        except ReviewSessionCard.DoesNotExist:
+            return HttpResponseClientRedirect(reverse("reviews:show_current_card"))
+    except SessionEndedError:
+        current_review.end()
+        return TemplateResponse(request, "reviews/end.html#content")
+    return _render_card(request, next_card, session)
 
 
 def move_to_next_card(request: HttpRequest):
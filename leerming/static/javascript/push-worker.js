@@ -0,0 +1,15 @@
+// Service worker of the review notifications, the pushes have no payload
+self.addEventListener('push', (event) => {
+  event.waitUntil(
+    self.registration.showNotification('Leerming', {
+      body: "C'est l'heure de votre révision !",
+      icon: '/static/android-chrome-192x192.png',
+      data: { url: '/reviews/start/' },
+    })
+  )
+})
+
+self.addEventListener('notificationclick', (event) => {
+  event.notification.close()
+  event.waitUntil(clients.openWindow(event.notification.data.url))
+})
@@ -0,0 +1,52 @@
+// Subscribe the browser to the push notifications with the toggle `#push-notifications`
+const PushNotifications = {
+  async init() {
+    const $toggle = document.getElementById('push-notifications')
+    if (!$toggle) return
+    if (!('serviceWorker' in navigator) || !('PushManager' in window)) {
+      $toggle.disabled = true
+      return
+    }
+    this.$toggle = $toggle
+    this.registration = await navigator.serviceWorker.register($toggle.dataset.workerUrl)
+    $toggle.checked = Boolean(await this.registration.pushManager.getSubscription())
+    $toggle.addEventListener('change', () => this.toggle())
+  },
+  _applicationServerKey() {
+    const base64 = this.$toggle.dataset.publicKey.replace(/-/g, '+').replace(/_/g, '/')
+    const raw = atob(base64 + '='.repeat((4 - (base64.length % 4)) % 4))
+    return Uint8Array.from(raw, (char) => char.charCodeAt(0))
+  },
+  _send(method, subscription) {
+    return fetch(this.$toggle.dataset.url, {
+      method,
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+      },
+      body: JSON.stringify(subscription),
+    })
+  },
+  async toggle() {
+    const existing = await this.registration.pushManager.getSubscription()
+    if (!this.$toggle.checked) {
+      if (existing) {
+        await this._send('DELETE', existing)
+        await existing.unsubscribe()
+      }
+      return
+    }
+    try {
+      const subscription = existing || await this.registration.pushManager.subscribe({
+        userVisibleOnly: true,
+        applicationServerKey: this._applicationServerKey(),
+      })
+      await this._send('POST', subscription)
+    } catch (error) {
+      // permission refused by the user
+      this.$toggle.checked = false
+    }
+  },
+}
+
+document.addEventListener('DOMContentLoaded', () => PushNotifications.init())
@@ -0,0 +1,16 @@
+// Tom-select for the topics, the topics are searched on the server with the url of `data-url`
+function initTopicSelect(selector, options = {}) {
+    return new TomSelect(selector, {
+        valueField: "value",
+        labelField: "text",
+        searchField: "text",
+        preload: "focus",
+        load: function (query, callback) {
+            fetch(`${this.input.dataset.url}?q=${encodeURIComponent(query)}`)
+                .then((response) => response.json())
+                .then((json) => callback(json.topics))
+                .catch(() => callback());
+        },
+        ...options,
+    });
+}